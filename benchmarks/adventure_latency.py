@@ -0,0 +1,123 @@
+"""
+Compare /adventure latency for pooled connections vs. opening one per call.
+
+Replays the database work of a regular /adventure against a throwaway
+database, first with a fresh aiosqlite connection per service call (the old
+``get_connection()`` pattern), then with the shared ConnectionPool, and
+finally with every call sharing one DatabaseManager.transaction().
+
+Usage: python -m benchmarks.adventure_latency [--runs 500] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+from database.db_manager import DatabaseManager, ConnectionPool
+from services.user_service import UserService
+from services.quest_service import QuestService
+from services.quest_engine import QuestEngine
+
+
+class OpenPerCallPool:
+    """Pool stand-in reproducing the old connect/PRAGMA/close cycle"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def _connect(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.path)
+        conn.row_factory = aiosqlite.Row
+        await conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @asynccontextmanager
+    async def reader(self):
+        conn = await self._connect()
+        try:
+            yield conn
+        finally:
+            await conn.close()
+
+    @asynccontextmanager
+    async def writer(self):
+        conn = await self._connect()
+        try:
+            yield conn
+            await conn.commit()
+        finally:
+            await conn.close()
+
+    async def close(self):
+        pass
+
+
+async def adventure(user_id: int, uow=None):
+    """Database calls made by one regular /adventure"""
+    await UserService.ensure_user_exists(user_id, f"user{user_id}", uow=uow)
+    user = await UserService.get_user(user_id, uow=uow)
+    await UserService.add_xp_and_coins(user_id, random.randint(5, 30), random.randint(10, 50), uow=uow)
+    await UserService.update_user_stats(user_id, uow=uow, hp=user.hp, adventure_count=user.adventure_count + 1)
+    await QuestEngine.publish(user_id, ('adventure', 'coins'), uow)
+
+
+async def adventure_in_transaction(user_id: int):
+    """The same calls sharing one unit of work, as the /adventure command does"""
+    async with DatabaseManager.transaction() as uow:
+        await adventure(user_id, uow)
+
+
+async def measure(pool, runs: int, concurrency: int, command=adventure) -> list[float]:
+    DatabaseManager._pool = pool
+    UserService.cache.clear()
+    QuestService.active.clear()
+    await DatabaseManager.init_db()
+    await QuestService.load_catalog()
+
+    samples = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with sem:
+            start = time.perf_counter()
+            await command(1000 + i % 50)
+            samples.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(runs)))
+    await DatabaseManager.close()
+    return samples
+
+
+def report(label: str, samples: list[float]):
+    ordered = sorted(samples)
+    p50 = statistics.median(ordered)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<14} p50 {p50:8.2f} ms   p99 {p99:8.2f} ms   ({len(samples)} runs)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = await measure(OpenPerCallPool(os.path.join(tmp, "legacy.db")), args.runs, args.concurrency)
+        pooled = await measure(ConnectionPool(os.path.join(tmp, "pooled.db")), args.runs, args.concurrency)
+        unit_of_work = await measure(
+            ConnectionPool(os.path.join(tmp, "uow.db")), args.runs, args.concurrency, adventure_in_transaction
+        )
+
+    report("open-per-call", legacy)
+    report("pooled", pooled)
+    report("unit of work", unit_of_work)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""
+Compare per-render profile card time with and without precomputed layers.
+
+Renders the same card repeatedly in-process. "rebuilt" clears every static
+layer cache before each render, reproducing the old behaviour of drawing the
+gradient row by row, re-loading fonts, rebuilding masks and drawing the static
+bars and boxes per card, then encoding at zlib's default level; "cached"
+warms the templates once, as each RenderPool worker does at startup, and
+encodes at PNG_COMPRESS_LEVEL.
+
+Emoji are skipped by default so the run needs no network; pass
+``--emoji twemoji`` to include the (cached) Twemoji downloads.
+
+Usage: python -m benchmarks.card_render [--runs 200] [--emoji none|twemoji]
+"""
+import argparse
+import statistics
+import time
+from dataclasses import asdict
+from io import BytesIO
+from typing import Optional
+
+from PIL import Image
+from pilmoji.source import BaseSource
+
+from models.user import User
+from utils import profile_card_gen
+from utils.profile_card_gen import (
+    CARD_SIZE, PNG_COMPRESS_LEVEL, CachedTwemoji, render_card, warm_templates
+)
+
+
+class NoEmoji(BaseSource):
+    """Emoji source that draws nothing, for offline runs"""
+
+    def get_emoji(self, emoji: str, /) -> Optional[BytesIO]:
+        return None
+
+    def get_discord_emoji(self, id: int, /) -> Optional[BytesIO]:
+        return None
+
+
+def clear_layers():
+    profile_card_gen._templates.clear()
+    profile_card_gen._backgrounds.clear()
+    profile_card_gen._avatars.clear()
+    profile_card_gen.card_fonts.cache_clear()
+    profile_card_gen.border_mask.cache_clear()
+    profile_card_gen.gradient_layer.cache_clear()
+
+
+def measure(runs: int, snapshot: dict, avatar: bytes, rebuild: bool) -> list[float]:
+    clear_layers()
+    profile_card_gen.PNG_COMPRESS_LEVEL = 6 if rebuild else PNG_COMPRESS_LEVEL
+    if not rebuild:
+        warm_templates()
+
+    samples = []
+    for _ in range(runs):
+        if rebuild:
+            clear_layers()
+        start = time.perf_counter()
+        render_card(snapshot, None, "benchmark", avatar)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples: list[float]):
+    ordered = sorted(samples)
+    p50 = statistics.median(ordered)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<8} p50 {p50:8.2f} ms   p99 {p99:8.2f} ms   ({len(samples)} runs)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--emoji", choices=("none", "twemoji"), default="none")
+    args = parser.parse_args()
+
+    profile_card_gen.EMOJI_SOURCE = NoEmoji if args.emoji == "none" else CachedTwemoji
+
+    user = User(user_id=1, username="benchmark", balance=12345, level=42, xp=1234,
+                cls="Warrior", hp=80, max_hp=120, attack=30, defense=20,
+                adventure_count=300, pvp_wins=25, pvp_losses=10, boss_kills=7)
+    snapshot = asdict(user)
+    buffer = BytesIO()
+    Image.new('RGBA', (128, 128), (200, 120, 80, 255)).save(buffer, format='PNG')
+    avatar = buffer.getvalue()
+
+    # One untimed render so imports and first-use costs hit neither side
+    render_card(snapshot, None, "benchmark", avatar)
+
+    report("rebuilt", measure(args.runs, snapshot, avatar, rebuild=True))
+    report("cached", measure(args.runs, snapshot, avatar, rebuild=False))
+    print(f"card size {CARD_SIZE[0]}x{CARD_SIZE[1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare giveaway winner selection: the old per-prize loop vs. utils.draw.
+
+The old loop called random.choices with a rebuilt list of identical weights
+for every pick and then list.remove(winner), costing O(n) per winner. The
+draw module sorts the entrants once (so a seed is reproducible), samples
+without replacement (O(k) for equal weights, O(n + k log n) weighted) and
+gives each winner a single prize by its chance.
+
+Also checks that a seed reproduces a draw, and that prize chances show up
+in the results.
+
+Usage: python -m benchmarks.giveaway_draw [--entrants 100000] [--winners 10] [--runs 5]
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import Counter
+
+from utils.draw import draw
+
+PRIZES = [("Nitro", 50), ("Role", 30), ("Coins", 20)]
+
+
+def legacy_draw(users: list, prize_list: list, winners: int) -> list:
+    """The selection loop /giveaway used to run"""
+    winners_results = []
+    for prize_name, chance in prize_list:
+        eligible_users = users.copy()
+        if not eligible_users:
+            break
+        for _ in range(winners):
+            winner = random.choices(
+                population=eligible_users,
+                weights=[chance]*len(eligible_users),
+                k=1
+            )[0]
+            winners_results.append((winner, prize_name))
+            eligible_users.remove(winner)
+    return winners_results
+
+
+def measure(fn, runs: int) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples: list[float]):
+    print(f"{label:<8} median {statistics.median(samples):10.2f} ms   ({len(samples)} runs)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entrants", type=int, default=100_000)
+    parser.add_argument("--winners", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    users = list(range(10**17, 10**17 + args.entrants))
+    random.shuffle(users)
+
+    report("legacy", measure(lambda: legacy_draw(users, PRIZES, args.winners), args.runs))
+    report("draw", measure(lambda: draw(users, PRIZES, args.winners * len(PRIZES)), args.runs))
+
+    first = draw(users, PRIZES, args.winners)
+    again = draw(list(reversed(users)), PRIZES, args.winners, seed=first.seed)
+    winner_ids = [entrant for entrant, _ in first.winners]
+    print(f"seed {first.seed} reproduces: {first == again}; distinct winners: "
+          f"{len(set(winner_ids)) == len(winner_ids)}")
+
+    counts = Counter(prize for _, prize in draw(users, PRIZES, 10_000).winners)
+    print("prize share over 10,000 winners:",
+          ", ".join(f"{name} {counts[name] / 100:.1f}% (chance {chance})" for name, chance in PRIZES))
+
+
+if __name__ == "__main__":
+    main()
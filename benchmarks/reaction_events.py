@@ -0,0 +1,106 @@
+"""
+Measure reaction-role events per second with debug logging off and on.
+
+Feeds synthetic raw reaction events through ReactionRoles.handle_reaction
+with stand-in guild, member and role objects, so only the cog's own work
+and its logging are timed. Role changes are queued in the cog's RoleBatcher
+and applied to the stand-in member after each run; the batching stats show
+how many edits the toggles coalesced into. Logging goes through the same
+queue pipeline bot.py installs, with the listener writing to os.devnull.
+
+Usage: python -m benchmarks.reaction_events [--events 50000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from types import SimpleNamespace
+
+import discord
+
+from cogs.reaction_roles import ReactionRoles
+from utils.constants import DATE_FORMAT, LOG_FORMAT
+from utils.log_queue import configure_logging
+
+MESSAGE_ID = 1001
+EMOJI = "🎭"
+
+
+class FakeMember:
+    id = 42
+    name = "member"
+
+    def __init__(self):
+        self.roles = [SimpleNamespace(id=1, name="@everyone")]
+
+    async def edit(self, *, roles, reason=None):
+        self.roles = self.roles[:1] + list(roles)
+        return self
+
+
+class FakeGuild:
+    id = 1
+
+    def __init__(self):
+        self.member = FakeMember()
+        self.role = SimpleNamespace(id=7, name="role")
+
+    def get_member(self, user_id):
+        return self.member
+
+    def get_role(self, role_id):
+        return self.role
+
+
+class FakeBot:
+    def __init__(self):
+        self.user = SimpleNamespace(id=0)
+        self.guild = FakeGuild()
+
+    def get_guild(self, guild_id):
+        return self.guild
+
+
+async def measure(cog: ReactionRoles, events: int, message_id: int) -> float:
+    payload = SimpleNamespace(
+        message_id=message_id, user_id=42, guild_id=1, emoji=discord.PartialEmoji(name=EMOJI)
+    )
+    start = time.perf_counter()
+    for i in range(events):
+        await cog.handle_reaction(payload, add=i % 2 == 0)
+    rate = events / (time.perf_counter() - start)
+    await cog.role_batcher.flush()
+    return rate
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=50_000)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    listener = configure_logging(logging.INFO, LOG_FORMAT, DATE_FORMAT, logging.StreamHandler(devnull))
+    cog_log = logging.getLogger("cogs.reaction_roles")
+
+    cog = ReactionRoles(FakeBot())
+    cog.routes = {MESSAGE_ID: {EMOJI: 7}}
+
+    try:
+        untracked = await measure(cog, args.events, MESSAGE_ID + 1)
+        cog_log.setLevel(logging.INFO)
+        quiet = await measure(cog, args.events, MESSAGE_ID)
+        cog_log.setLevel(logging.DEBUG)
+        debug = await measure(cog, args.events, MESSAGE_ID)
+    finally:
+        listener.stop()
+        devnull.close()
+
+    print(f"untracked message   {untracked:12,.0f} events/s")
+    print(f"debug logging off   {quiet:12,.0f} events/s")
+    print(f"debug logging on    {debug:12,.0f} events/s")
+    print(f"role batching       {cog.role_batcher.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,14 +4,11 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 
-from utils.constants import INTENTS, TOKEN, LOG_FORMAT, DATE_FORMAT
-
-logging.basicConfig(
-    level=logging.INFO,
-    format=LOG_FORMAT,
-    datefmt=DATE_FORMAT,
-    handlers=[logging.StreamHandler()],
-)
+from utils.constants import INTENTS, TOKEN, LOG_FORMAT, DATE_FORMAT, LOG_LEVEL
+from database.db_manager import DatabaseManager
+from utils.http import HttpClient
+from utils.log_queue import configure_logging
+from utils.profile_card_gen import ProfileCardGenerator
 
 logger = logging.getLogger("bot")
 
@@ -25,79 +22,99 @@ COGS = [
     "cogs.rpg",
 ]
 
-bot = commands.Bot(
-    command_prefix=commands.when_mentioned,  # prefix unused but required
-    intents=INTENTS,
-)
-
-@bot.event
-async def on_ready():
-    await bot.tree.sync()
-    logger.info("✅ Logged in as %s (%s)", bot.user, bot.user.id)
-    logger.info("🔁 Slash commands synced")
+def create_bot() -> commands.Bot:
+    """Build the bot and its event handlers
 
+    Kept out of module scope: render workers are spawned processes that
+    re-import this file, and must not build a bot of their own.
+    """
+    bot = commands.Bot(
+        command_prefix=commands.when_mentioned,  # prefix unused but required
+        intents=INTENTS,
+    )
 
-@bot.event
-async def on_interaction(interaction: discord.Interaction):
-    if interaction.type is discord.InteractionType.application_command:
+    @bot.event
+    async def on_ready():
+        await bot.tree.sync()
+        logger.info("✅ Logged in as %s (%s)", bot.user, bot.user.id)
+        logger.info("🔁 Slash commands synced")
+
+
+    @bot.event
+    async def on_interaction(interaction: discord.Interaction):
+        if interaction.type is discord.InteractionType.application_command:
+            logger.info(
+                "➡️ Slash command attempt '/%s' by %s (%s)",
+                interaction.data.get("name", "unknown"),
+                interaction.user,
+                interaction.user.id,
+            )
+
+
+    @bot.event
+    async def on_app_command_completion(
+        interaction: discord.Interaction,
+        command: app_commands.Command,
+    ):
         logger.info(
-            "➡️ Slash command attempt '/%s' by %s (%s)",
-            interaction.data.get("name", "unknown"),
+            "📥 Slash command '/%s' executed by %s (%s) in %s",
+            command.qualified_name,
             interaction.user,
             interaction.user.id,
+            interaction.guild.name if interaction.guild else "DM",
         )
 
+    @bot.tree.error
+    async def on_app_command_error(
+        interaction: discord.Interaction,
+        error: app_commands.AppCommandError,
+    ):
+        logger.error(
+            "❌ Slash command error: /%s by %s (%s)",
+            interaction.command.name if interaction.command else "unknown",
+            interaction.user,
+            interaction.user.id,
+            exc_info=True,
+        )
 
-@bot.event
-async def on_app_command_completion(
-    interaction: discord.Interaction,
-    command: app_commands.Command,
-):
-    logger.info(
-        "📥 Slash command '/%s' executed by %s (%s) in %s",
-        command.qualified_name,
-        interaction.user,
-        interaction.user.id,
-        interaction.guild.name if interaction.guild else "DM",
-    )
+        message = "❌ An error occurred while executing this command."
 
-@bot.tree.error
-async def on_app_command_error(
-    interaction: discord.Interaction,
-    error: app_commands.AppCommandError,
-):
-    logger.error(
-        "❌ Slash command error: /%s by %s (%s)",
-        interaction.command.name if interaction.command else "unknown",
-        interaction.user,
-        interaction.user.id,
-        exc_info=True,
-    )
+        if interaction.response.is_done():
+            await interaction.followup.send(message, ephemeral=True)
+        else:
+            await interaction.response.send_message(message, ephemeral=True)
 
-    message = "❌ An error occurred while executing this command."
+    return bot
 
-    if interaction.response.is_done():
-        await interaction.followup.send(message, ephemeral=True)
-    else:
-        await interaction.response.send_message(message, ephemeral=True)
 
 async def main():
-    async with bot:
-        for cog in COGS:
-            try:
-                await bot.load_extension(cog)
-                logger.info("🔧 Loaded %s", cog)
-            except Exception:
-                logger.exception("❌ Failed to load %s", cog)
-
-        if not TOKEN:
-            logger.critical("DISCORD_BOT_TOKEN is missing.")
-            raise SystemExit("DISCORD_BOT_TOKEN is missing.")
-
-        await bot.start(TOKEN)
+    bot = create_bot()
+    try:
+        # Open the shared HTTP session up front so the first command doesn't pay for it
+        HttpClient.session()
+        async with bot:
+            for cog in COGS:
+                try:
+                    await bot.load_extension(cog)
+                    logger.info("🔧 Loaded %s", cog)
+                except Exception:
+                    logger.exception("❌ Failed to load %s", cog)
+
+            if not TOKEN:
+                logger.critical("DISCORD_BOT_TOKEN is missing.")
+                raise SystemExit("DISCORD_BOT_TOKEN is missing.")
+
+            await bot.start(TOKEN)
+    finally:
+        # Cogs may still flush to the database while the bot closes
+        await DatabaseManager.close()
+        await HttpClient.close()
+        ProfileCardGenerator.renderer.shutdown()
 
 
 if __name__ == "__main__":
+    # Handlers write from a listener thread so log I/O never blocks the event loop
+    log_listener = configure_logging(LOG_LEVEL, LOG_FORMAT, DATE_FORMAT)
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -106,3 +123,4 @@ if __name__ == "__main__":
         logger.exception("❌ Fatal error")
     finally:
         logger.info("🛑 Shutting down...")
+        log_listener.stop()
@@ -1,6 +1,7 @@
 import random
+import time
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
 import discord
 from discord import app_commands, Embed, Color
@@ -8,21 +9,40 @@ from discord.ext import commands
 
 from utils.cooldown_manager import CooldownManager
 from utils.game_logic import GameLogic
-from database.db_manager import DatabaseManager
+from database.db_manager import DatabaseManager, UnitOfWork
 from services.user_service import UserService
 from models.user import User
 from utils.game_logic import GameLogic
 from services.quest_service import QuestService
+from services.quest_engine import QuestEngine
+from utils.component_router import ComponentRouter
+from utils.lru_cache import TTLCache
+from utils.scheduler import Scheduler
 from view.pvp import PvPChallengeView
 from database.adventure_data import ADVENTURE_OUTCOMES
 
+# Seconds a challenged player has to answer
+PVP_TIMEOUT = 60
+
 class CombatCommands(commands.Cog):
     """Combat and adventure commands"""
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.cooldown_manager = CooldownManager()
-        self.active_pvp_challenges: Dict[int, PvPChallengeView] = {}
+        # target id -> (channel id, message id) of their open challenge; None while it is being sent
+        self.active_pvp_challenges: Dict[int, Optional[Tuple[int, int]]] = {}
+        self.pvp_expiry = Scheduler(self.expire_pvp_challenges)
+        # Challenges already answered; anything older is rejected by age anyway
+        self.answered_challenges = TTLCache(ttl=PVP_TIMEOUT)
+    
+    async def cog_load(self):
+        ComponentRouter.register(self.bot, "pvp", self.answer_pvp_challenge)
+        self.pvp_expiry.start()
+    
+    async def cog_unload(self):
+        ComponentRouter.unregister("pvp", self.answer_pvp_challenge)
+        await self.pvp_expiry.stop()
     
     @app_commands.command(name="adventure", description="Go on adventure")
     async def adventure(self, interaction: discord.Interaction):
@@ -31,27 +51,27 @@ class CombatCommands(commands.Cog):
             await interaction.response.send_message(f"⏳ Cooldown: {cd}s", ephemeral=True)
             return
         
-        await UserService.ensure_user_exists(interaction.user.id, interaction.user.name)
-        user = await UserService.get_user(interaction.user.id)
+        async with DatabaseManager.transaction() as uow:
+            await UserService.ensure_user_exists(interaction.user.id, interaction.user.name, uow=uow)
+            user = await UserService.get_user(interaction.user.id, uow=uow)
+            
+            if user.is_alive():
+                # Boss encounter (10% at lv10+)
+                if user.level >= 10 and random.random() < 0.1:
+                    result, events = await self._boss_encounter(user, interaction.user.id, uow)
+                else:
+                    # Regular adventure
+                    result, events = await self._regular_adventure(user, interaction.user.id, uow)
+                
+                # Advance quests for everything this adventure changed
+                completed = await QuestEngine.publish(interaction.user.id, events, uow)
         
         if not user.is_alive():
             await interaction.response.send_message("💀 Too injured!", ephemeral=True)
             return
         
-        # Boss encounter (10% at lv10+)
-        if user.level >= 10 and random.random() < 0.1:
-            result = await self._boss_encounter(user, interaction.user.id)
-            await interaction.response.send_message(embed=result)
-        else:
-            # Regular adventure
-            result = await self._regular_adventure(user, interaction.user.id)
-            await interaction.response.send_message(embed=result)
-        
-        # Update quest progress
-        await QuestService.update_quest_progress(interaction.user.id, 'adventure')
+        await interaction.response.send_message(embed=result)
         
-        # Check for completed quests
-        completed = await QuestService.check_quest_completion(interaction.user.id)
         if completed:
             quest_text = "\n".join([
                 f"✅ **{q['name']}** - {q['reward_coins']} coins, {q['reward_xp']} XP"
@@ -62,8 +82,8 @@ class CombatCommands(commands.Cog):
                 ephemeral=False
             )
     
-    async def _boss_encounter(self, user: User, user_id: int) -> Embed:
-        """Handle boss encounter"""
+    async def _boss_encounter(self, user: User, user_id: int, uow: UnitOfWork) -> Tuple[Embed, Tuple[str, ...]]:
+        """Handle boss encounter, returning the embed and the quest events it caused"""
         boss_hp = 50 + user.level * 5
         player_power = user.attack + random.randint(5, 15)
         boss_power = 10 + user.level * 2 + random.randint(0, 10)
@@ -75,35 +95,29 @@ class CombatCommands(commands.Cog):
             reward_xp = 50 + user.level * 10
             new_hp = max(0, user.hp - dmg)
             
-            conn = await DatabaseManager.get_connection()
-            try:
+            async with DatabaseManager.writer(uow) as conn:
                 await conn.execute("""
                     UPDATE users
-                    SET balance = balance + ?, xp = xp + ?, hp = ?,
+                    SET balance = balance + ?, xp = xp + ?, hp = ?, hp_updated_at = ?,
                         adventure_count = adventure_count + 1, boss_kills = boss_kills + 1
                     WHERE user_id = ?
-                """, (reward_coins, reward_xp, new_hp, user_id))
-                await conn.commit()
-            finally:
-                await conn.close()
-            
-            # Update boss quest progress
-            await QuestService.update_quest_progress(user_id, 'boss')
+                """, (reward_coins, reward_xp, new_hp, time.time(), user_id))
+            UserService.invalidate(user_id, uow)
             
             embed = Embed(title="🐉 BOSS DEFEATED!", description="Mighty boss slain!", color=Color.red())
             embed.add_field(name="Rewards", value=f"💰 {reward_coins} coins\n✨ {reward_xp} XP")
             embed.add_field(name="Damage", value=f"💔 -{dmg} HP")
-            return embed
+            return embed, ('adventure', 'boss', 'coins')
         else:
             # Defeat
             new_hp = max(0, user.hp - dmg * 2)
-            await UserService.update_user_stats(user_id, hp=new_hp, adventure_count=user.adventure_count + 1)
+            await UserService.update_user_stats(user_id, uow=uow, hp=new_hp, adventure_count=user.adventure_count + 1)
             
             embed = Embed(title="💀 Boss Victory", description=f"You were defeated! Lost {dmg*2} HP.", color=Color.dark_red())
-            return embed
+            return embed, ('adventure',)
     
-    async def _regular_adventure(self, user: User, user_id: int) -> Embed:
-        """Handle regular adventure"""
+    async def _regular_adventure(self, user: User, user_id: int, uow: UnitOfWork) -> Tuple[Embed, Tuple[str, ...]]:
+        """Handle regular adventure, returning the embed and the quest events it caused"""
 
         outcome = random.choice(ADVENTURE_OUTCOMES)
         coins = random.randint(*outcome['c'])
@@ -113,9 +127,10 @@ class CombatCommands(commands.Cog):
         new_hp = max(0, min(user.hp + hp_change, user.max_hp))
         
         # Update with XP/level handling
-        result = await UserService.add_xp_and_coins(user_id, xp, coins)
+        result = await UserService.add_xp_and_coins(user_id, xp, coins, uow=uow)
         await UserService.update_user_stats(
             user_id,
+            uow=uow,
             hp=new_hp,
             adventure_count=user.adventure_count + 1
         )
@@ -126,8 +141,9 @@ class CombatCommands(commands.Cog):
         
         if result['leveled_up']:
             embed.add_field(name="🎉 LEVEL UP!", value=f"Now level {result['new_level']}!", inline=False)
+            return embed, ('adventure', 'coins', 'level')
         
-        return embed
+        return embed, ('adventure', 'coins')
     
     @app_commands.command(name="pvp", description="Challenge player to PvP")
     async def pvp(self, interaction: discord.Interaction, target: discord.User):
@@ -147,28 +163,46 @@ class CombatCommands(commands.Cog):
             )
             return
         
+        # Reserve the target before the first await so a concurrent /pvp sees it
+        self.active_pvp_challenges[target.id] = None
+        message = None
+        try:
+            message = await self._post_pvp_challenge(interaction, target)
+        finally:
+            if message is None:
+                del self.active_pvp_challenges[target.id]
+        if message is None:
+            return
+        
+        # The target may have answered before the message came back
+        if message.id in self.answered_challenges:
+            del self.active_pvp_challenges[target.id]
+            return
+        
+        self.active_pvp_challenges[target.id] = (message.channel.id, message.id)
+        self.pvp_expiry.schedule(target.id, message.created_at.timestamp() + PVP_TIMEOUT)
+    
+    async def _post_pvp_challenge(self, interaction: discord.Interaction, target: discord.User) -> Optional[discord.Message]:
+        """Check both fighters and send the challenge; None if it wasn't sent"""
         cd = self.cooldown_manager.check_cooldown(interaction.user.id, "pvp", 600)
         if cd:
             await interaction.response.send_message(f"⏳ PvP cooldown: {cd}s", ephemeral=True)
-            return
-        
-        await UserService.ensure_user_exists(interaction.user.id, interaction.user.name)
-        await UserService.ensure_user_exists(target.id, target.name)
+            return None
         
-        attacker = await UserService.get_user(interaction.user.id)
-        defender = await UserService.get_user(target.id)
+        async with DatabaseManager.transaction() as uow:
+            await UserService.ensure_user_exists(interaction.user.id, interaction.user.name, uow=uow)
+            await UserService.ensure_user_exists(target.id, target.name, uow=uow)
+            
+            attacker = await UserService.get_user(interaction.user.id, uow=uow)
+            defender = await UserService.get_user(target.id, uow=uow)
         
         if not attacker.is_alive():
             await interaction.response.send_message("💀 You're too injured!", ephemeral=True)
-            return
+            return None
         
         if not defender.is_alive():
             await interaction.response.send_message("💀 Target is too injured!", ephemeral=True)
-            return
-        
-        # Create challenge view
-        view = PvPChallengeView(interaction.user, target, timeout=60)
-        self.active_pvp_challenges[target.id] = view
+            return None
         
         # Send challenge
         embed = Embed(
@@ -178,78 +212,125 @@ class CombatCommands(commands.Cog):
         )
         embed.add_field(name=f"{interaction.user.name}", value=f"Level {attacker.level}\nHP: {attacker.hp}/{attacker.max_hp}\nAttack: {attacker.attack}", inline=True)
         embed.add_field(name=f"{target.name}", value=f"Level {defender.level}\nHP: {defender.hp}/{defender.max_hp}\nAttack: {defender.attack}", inline=True)
-        embed.set_footer(text=f"{target.name} has 60 seconds to respond")
+        embed.set_footer(text=f"{target.name} has {PVP_TIMEOUT} seconds to respond")
+        
+        # The answer is handled by the "pvp" route, so nothing waits on the view
+        await interaction.response.send_message(embed=embed, view=PvPChallengeView(interaction.user.id, target.id))
+        return await interaction.original_response()
+    
+    async def answer_pvp_challenge(self, interaction: discord.Interaction, target_id: int, page: str):
+        """Route handler for the Accept/Decline buttons"""
+        if interaction.user.id != target_id:
+            await interaction.response.send_message("❌ This challenge isn't for you!", ephemeral=True)
+            return
         
-        await interaction.response.send_message(embed=embed, view=view)
-        view.message = await interaction.original_response()
+        action, _, challenger_id = page.partition("-")
+        message = interaction.message
+        age = (discord.utils.utcnow() - message.created_at).total_seconds()
+        if message.id in self.answered_challenges:
+            await interaction.response.send_message("❌ This challenge was already answered.", ephemeral=True)
+            return
+        if age > PVP_TIMEOUT:
+            await interaction.response.edit_message(
+                content=f"⏱️ Challenge timed out. {interaction.user.mention} didn't respond.",
+                view=None
+            )
+            return
         
-        # Wait for response
-        await view.wait()
+        # Claim the challenge before the first await so a double click can't fight twice
+        self.answered_challenges.set(message.id, True)
+        entry = self.active_pvp_challenges.get(target_id)
+        if entry is not None and entry[1] == message.id:
+            del self.active_pvp_challenges[target_id]
+            self.pvp_expiry.cancel(target_id)
+        
+        if action != "accept":
+            await interaction.response.edit_message(
+                content=f"❌ {interaction.user.mention} declined the challenge.",
+                view=None
+            )
+            return
         
-        # Remove from active challenges
-        if target.id in self.active_pvp_challenges:
-            del self.active_pvp_challenges[target.id]
+        await interaction.response.edit_message(
+            content=f"✅ {interaction.user.mention} accepted the challenge!",
+            view=None
+        )
         
-        # If declined or timed out
-        if not view.accepted:
+        # Fight with current stats, which may have changed since the challenge
+        attacker = await UserService.get_user(int(challenger_id))
+        defender = await UserService.get_user(target_id)
+        if not attacker or not defender or not attacker.is_alive() or not defender.is_alive():
+            await interaction.followup.send("💀 One of the fighters is too injured to battle now!")
             return
         
-        # Proceed with battle
-        await self._execute_pvp_battle(interaction, attacker, defender, target)
+        await self._execute_pvp_battle(interaction, attacker, defender)
+    
+    async def expire_pvp_challenges(self, target_ids: list):
+        for target_id in target_ids:
+            entry = self.active_pvp_challenges.pop(target_id, None)
+            if entry is None:
+                continue
+            
+            channel_id, message_id = entry
+            message = self.bot.get_partial_messageable(channel_id).get_partial_message(message_id)
+            try:
+                await message.edit(
+                    content=f"⏱️ Challenge timed out. <@{target_id}> didn't respond.",
+                    view=None
+                )
+            except discord.HTTPException:
+                pass
     
     async def _execute_pvp_battle(
         self,
         interaction: discord.Interaction,
         attacker: User,
-        defender: User,
-        target: discord.User
+        defender: User
     ):
         """Execute the actual PvP battle"""
         # Calculate battle
         a_power = GameLogic.calculate_battle_power(attacker.attack, attacker.level)
         d_power = GameLogic.calculate_battle_power(defender.attack, defender.level)
         
-        winner_id = interaction.user.id if a_power >= d_power else target.id
-        loser_id = target.id if winner_id == interaction.user.id else interaction.user.id
+        winner_id = attacker.user_id if a_power >= d_power else defender.user_id
+        loser_id = defender.user_id if winner_id == attacker.user_id else attacker.user_id
         
         dmg = abs(a_power - d_power) // 10
-        loser_hp = max(0, (attacker.hp if loser_id == interaction.user.id else defender.hp) - dmg)
+        loser_hp = max(0, (attacker.hp if loser_id == attacker.user_id else defender.hp) - dmg)
         
         # Update database
-        conn = await DatabaseManager.get_connection()
-        try:
-            await conn.execute("UPDATE users SET hp = ? WHERE user_id = ?", (loser_hp, loser_id))
+        async with DatabaseManager.transaction() as uow:
+            conn = uow.conn
+            await conn.execute("UPDATE users SET hp = ?, hp_updated_at = ? WHERE user_id = ?",
+                             (loser_hp, time.time(), loser_id))
             await conn.execute("UPDATE users SET pvp_wins = pvp_wins + 1 WHERE user_id = ?", (winner_id,))
             await conn.execute("UPDATE users SET pvp_losses = pvp_losses + 1 WHERE user_id = ?", (loser_id,))
             await conn.execute("""
                 INSERT INTO pvp (attacker_id, defender_id, winner_id, timestamp, attacker_power, defender_power)
                 VALUES (?, ?, ?, ?, ?, ?)
-            """, (interaction.user.id, target.id, winner_id, datetime.now().isoformat(), a_power, d_power))
-            await conn.commit()
-        finally:
-            await conn.close()
-        
-        # Update quest progress
-        await QuestService.update_quest_progress(winner_id, 'pvp')
+            """, (attacker.user_id, defender.user_id, winner_id, datetime.now().isoformat(), a_power, d_power))
+            UserService.invalidate(winner_id, uow)
+            UserService.invalidate(loser_id, uow)
+            
+            # Advance the winner's PvP quests and collect completed ones
+            completed = await QuestEngine.publish(winner_id, ('pvp',), uow)
         
-        winner = interaction.user if winner_id == interaction.user.id else target
+        winner = attacker if winner_id == attacker.user_id else defender
         
         embed = Embed(title="⚔️ PvP Battle Results!", color=Color.red())
-        embed.add_field(name="Combatants", value=f"{interaction.user.mention} vs {target.mention}", inline=False)
-        embed.add_field(name="Powers", value=f"{interaction.user.name}: {a_power}\n{target.name}: {d_power}")
-        embed.add_field(name="Result", value=f"🏆 Winner: {winner.mention}\n💔 Damage: {dmg} HP")
+        embed.add_field(name="Combatants", value=f"<@{attacker.user_id}> vs <@{defender.user_id}>", inline=False)
+        embed.add_field(name="Powers", value=f"{attacker.username}: {a_power}\n{defender.username}: {d_power}")
+        embed.add_field(name="Result", value=f"🏆 Winner: <@{winner.user_id}>\n💔 Damage: {dmg} HP")
         
         await interaction.followup.send(embed=embed)
         
-        # Check for quest completion
-        completed = await QuestService.check_quest_completion(winner_id)
         if completed:
             quest_text = "\n".join([
                 f"✅ **{q['name']}** - {q['reward_coins']} coins, {q['reward_xp']} XP"
                 for q in completed
             ])
             await interaction.followup.send(
-                f"🎊 **{winner.mention} completed a quest!**\n{quest_text}",
+                f"🎊 **<@{winner.user_id}> completed a quest!**\n{quest_text}",
                 ephemeral=False
             )
     
@@ -284,14 +365,11 @@ class CombatCommands(commands.Cog):
         available = await QuestService.get_available_quests(user.level)
         
         # Get user's active/completed quests
-        conn = await DatabaseManager.get_connection()
-        try:
+        async with DatabaseManager.reader() as conn:
             async with conn.execute("""
                 SELECT quest_id, status FROM user_quests WHERE user_id = ?
             """, (interaction.user.id,)) as cursor:
                 user_quests = {row['quest_id']: row['status'] for row in await cursor.fetchall()}
-        finally:
-            await conn.close()
         
         embed = Embed(
             title="📋 Quest Board",
@@ -322,18 +400,20 @@ class CombatCommands(commands.Cog):
     
     @app_commands.command(name="acceptquest", description="Accept a quest")
     async def acceptquest(self, interaction: discord.Interaction, quest_id: int):
-        await UserService.ensure_user_exists(interaction.user.id, interaction.user.name)
-        user = await UserService.get_user(interaction.user.id)
-        
-        # Check quest requirements
-        conn = await DatabaseManager.get_connection()
-        try:
-            async with conn.execute("""
-                SELECT requirement_level FROM quests WHERE quest_id = ?
-            """, (quest_id,)) as cursor:
-                quest = await cursor.fetchone()
-        finally:
-            await conn.close()
+        async with DatabaseManager.transaction() as uow:
+            await UserService.ensure_user_exists(interaction.user.id, interaction.user.name, uow=uow)
+            user = await UserService.get_user(interaction.user.id, uow=uow)
+            
+            # Check quest requirements
+            async with DatabaseManager.reader(uow) as conn:
+                async with conn.execute("""
+                    SELECT requirement_level FROM quests WHERE quest_id = ?
+                """, (quest_id,)) as cursor:
+                    quest = await cursor.fetchone()
+            
+            if quest and user.level >= quest['requirement_level']:
+                # Accept quest
+                result = await QuestService.accept_quest(interaction.user.id, quest_id, uow=uow)
         
         if not quest:
             await interaction.response.send_message("❌ Quest not found!", ephemeral=True)
@@ -346,9 +426,6 @@ class CombatCommands(commands.Cog):
             )
             return
         
-        # Accept quest
-        result = await QuestService.accept_quest(interaction.user.id, quest_id)
-        
         if not result['success']:
             await interaction.response.send_message(f"❌ {result['error']}", ephemeral=True)
             return
@@ -5,6 +5,7 @@ from discord import Embed, Color
 from discord import app_commands
 from discord.ext import commands
 from services.user_service import UserService
+from services.quest_engine import QuestEngine
 from utils.game_logic import GameLogic
 from database.db_manager import DatabaseManager
 
@@ -19,30 +20,32 @@ class EconomyCommands(commands.Cog):
         user_id = interaction.user.id
         today = datetime.now().date().isoformat()
         
-        await UserService.ensure_user_exists(user_id, interaction.user.name)
-        user = await UserService.get_user(user_id)
-        
-        # Fix: Use async database operations
-        conn = await DatabaseManager.get_connection()
-        try:
+        async with DatabaseManager.transaction() as uow:
+            await UserService.ensure_user_exists(user_id, interaction.user.name, uow=uow)
+            user = await UserService.get_user(user_id, uow=uow)
+            conn = uow.conn
+            
             async with conn.execute("SELECT last_daily FROM users WHERE user_id=?", (user_id,)) as cursor:
                 row = await cursor.fetchone()
             
-            if row and row['last_daily'] == today:
-                await interaction.response.send_message("⚠️ Already claimed today!", ephemeral=True)
-                return
-            
-            base = random.randint(50, 150)
-            bonus = user.level * 10
-            total = base + bonus
+            already_claimed = row and row['last_daily'] == today
             
-            await conn.execute(
-                "UPDATE users SET balance = balance + ?, last_daily = ? WHERE user_id = ?",
-                (total, today, user_id)
-            )
-            await conn.commit()
-        finally:
-            await conn.close()
+            if not already_claimed:
+                base = random.randint(50, 150)
+                bonus = user.level * 10
+                total = base + bonus
+                
+                await conn.execute(
+                    "UPDATE users SET balance = balance + ?, last_daily = ? WHERE user_id = ?",
+                    (total, today, user_id)
+                )
+                UserService.invalidate(user_id, uow)
+                
+                completed = await QuestEngine.publish(user_id, ('coins',), uow)
+        
+        if already_claimed:
+            await interaction.response.send_message("⚠️ Already claimed today!", ephemeral=True)
+            return
         
         embed = Embed(
             title="💰 Daily Reward!",
@@ -51,10 +54,29 @@ class EconomyCommands(commands.Cog):
         )
         embed.add_field(name="Balance", value=f"{user.balance + total:,}")
         await interaction.response.send_message(embed=embed)
+        
+        if completed:
+            quest_text = "\n".join([
+                f"✅ **{q['name']}** - {q['reward_coins']} coins, {q['reward_xp']} XP"
+                for q in completed
+            ])
+            await interaction.followup.send(f"🎊 **Quest Completed!**\n{quest_text}")
     
     @app_commands.command(name="heal", description="Fully restore HP (costs coins)")
     async def heal(self, interaction: discord.Interaction):
-        user = await UserService.get_user(interaction.user.id)
+        async with DatabaseManager.transaction() as uow:
+            user = await UserService.get_user(interaction.user.id, uow=uow)
+            
+            if user:
+                cost = GameLogic.calculate_heal_cost(user.level)
+                
+                if not user.is_full_hp() and user.balance >= cost:
+                    await UserService.update_user_stats(
+                        interaction.user.id,
+                        uow=uow,
+                        hp=user.max_hp,
+                        balance=user.balance - cost
+                    )
         
         if not user:
             await interaction.response.send_message("❌ Profile not found!", ephemeral=True)
@@ -64,18 +86,10 @@ class EconomyCommands(commands.Cog):
             await interaction.response.send_message("❤️ Already at full HP!", ephemeral=True)
             return
         
-        cost = GameLogic.calculate_heal_cost(user.level)
-        
         if user.balance < cost:
             await interaction.response.send_message(f"⚠️ Need {cost} coins!", ephemeral=True)
             return
         
-        await UserService.update_user_stats(
-            interaction.user.id,
-            hp=user.max_hp,
-            balance=user.balance - cost
-        )
-        
         await interaction.response.send_message(
             f"✨ Fully healed for {cost} coins! HP: {user.max_hp}/{user.max_hp}"
         )
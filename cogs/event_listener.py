@@ -1,15 +1,33 @@
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import Optional
+import asyncio
+import logging
 import random
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from database.db_manager import DatabaseManager
-from services.user_service import UserService
+from services.reward_buffer import RewardBuffer, FLUSH_INTERVAL
+from utils.throttle import MessageThrottle
+
+log = logging.getLogger(__name__)
 
 class EventListener(commands.Cog):
     """Listens to Discord events"""
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.rewards = RewardBuffer()
+        self.throttle = MessageThrottle(window=60)
+        self._flush_task: asyncio.Task | None = None
+        self.flush_rewards.start()
+    
+    async def cog_unload(self):
+        # A flush already running is shielded from this and finishes first
+        self.flush_rewards.cancel()
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.announce_level_ups()
+        log.info("Message throttle stats: %s", self.throttle.stats())
     
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -20,41 +38,45 @@ class EventListener(commands.Cog):
         user_id = message.author.id
         now = datetime.now()
         
-        await UserService.ensure_user_exists(user_id, message.author.name)
+        # Messages inside the 60 second window return without touching the database
+        if not await self.throttle.try_acquire(user_id, self._load_last_message):
+            return
         
-        # Get connection and handle it properly
-        conn = await DatabaseManager.get_connection()
-        try:
-            # Check last message timestamp
+        # Award coins and XP
+        coins = random.randint(1, 5)
+        xp = random.randint(1, 3)
+        
+        # Queue XP/coins; level ups are announced when the buffer is flushed
+        if self.rewards.add(user_id, message.author.name, xp, coins, now, context=message):
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self.announce_level_ups())
+    
+    async def _load_last_message(self, user_id: int) -> Optional[datetime]:
+        """Last rewarded message time, from the buffer or the database"""
+        last = self.rewards.last_message_at(user_id)
+        if last is not None:
+            return last
+        
+        async with DatabaseManager.reader() as conn:
             async with conn.execute("SELECT last_message_ts FROM users WHERE user_id = ?", (user_id,)) as cursor:
                 row = await cursor.fetchone()
-            
-            if row and row['last_message_ts']:
-                last = datetime.fromisoformat(row['last_message_ts'])
-                if now - last < timedelta(seconds=60):
-                    return
-            
-            # Award coins and XP
-            coins = random.randint(1, 5)
-            xp = random.randint(1, 3)
-            
-            # Update last message timestamp
-            await conn.execute(
-                "UPDATE users SET last_message_ts = ? WHERE user_id = ?",
-                (now.isoformat(), user_id)
-            )
-            await conn.commit()
-        finally:
-            await conn.close()
-        
-        # Handle XP/coins and level up
-        result = await UserService.add_xp_and_coins(user_id, xp, coins)
         
-        if result['leveled_up']:
+        if row and row['last_message_ts']:
+            return datetime.fromisoformat(row['last_message_ts'])
+        return None
+    
+    @tasks.loop(seconds=FLUSH_INTERVAL)
+    async def flush_rewards(self):
+        # Shielded so cancelling the loop on unload can't interrupt a write
+        await asyncio.shield(self.announce_level_ups())
+    
+    async def announce_level_ups(self):
+        """Flush buffered rewards and announce any level ups"""
+        for level_up in await self.rewards.flush():
+            message: discord.Message = level_up['context']
             try:
-                user = await UserService.get_user(user_id)
                 await message.channel.send(
-                    f"🎉 {message.author.mention} leveled up to **Level {result['new_level']}** ({user.cls})!"
+                    f"🎉 {message.author.mention} leveled up to **Level {level_up['new_level']}** ({level_up['cls']})!"
                 )
             except Exception as e:
                 print(f"Error sending level up message: {e}")
\ No newline at end of file
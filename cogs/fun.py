@@ -1,41 +1,138 @@
+import json
 import random
-import sqlite3
+import logging
 from datetime import date, datetime, timedelta
 import asyncio
-import aiohttp
 import discord
 from discord import app_commands, Embed, Color
-from discord.ext import commands, tasks
+from discord.ext import commands
 
+from database.db_manager import ConnectionPool
 from utils.constants import GIPHY_API_KEY, LUCK_STATUSES
+from utils.http import HttpClient
+from utils.draw import draw
+from utils.scheduler import Scheduler
 
 DB_PATH = "fun.db"
+REMINDER_CONCURRENCY = 5   # reminder messages sent at once when several fall due together
+REMINDER_RETRY = timedelta(minutes=5)   # delay before resending a reminder whose send failed
+REMINDER_ATTEMPTS = 5   # sends tried before a reminder is given up on
+SQL_BATCH = 500
+GIVEAWAY_EMOJI = "🎉"
 
-conn = sqlite3.connect(DB_PATH)
-c = conn.cursor()
-# Luck table
-c.execute("""
-CREATE TABLE IF NOT EXISTS user_luck (
-    user_id INTEGER PRIMARY KEY,
-    last_date TEXT
-)
-""")
-# Reminders table
-c.execute("""
-CREATE TABLE IF NOT EXISTS reminders (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER,
-    channel_id INTEGER,
-    message TEXT,
-    remind_at TEXT
-)
-""")
-conn.commit()
+log = logging.getLogger(__name__)
 
 class Fun(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.check_reminders.start()
+        self.db: ConnectionPool | None = None
+        self.reminders = Scheduler(self.deliver_reminders)
+        self.giveaways = Scheduler(self.end_giveaways)
+        # Entrant ids of running giveaways by message id, mirrored in giveaway_entries
+        self.entrants: dict[int, set[int]] = {}
+        self._starter: asyncio.Task | None = None
+
+    async def cog_load(self):
+        self.db = ConnectionPool(DB_PATH)
+        async with self.db.writer() as conn:
+            # Luck table
+            await conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_luck (
+                user_id INTEGER PRIMARY KEY,
+                last_date TEXT
+            )
+            """)
+            # Reminders table
+            await conn.execute("""
+            CREATE TABLE IF NOT EXISTS reminders (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                channel_id INTEGER,
+                message TEXT,
+                remind_at TEXT,
+                claimed_at TEXT,
+                attempts INTEGER DEFAULT 0
+            )
+            """)
+            # A reminder is claimed before it is sent and deleted once delivered
+            async with conn.execute("PRAGMA table_info(reminders)") as cursor:
+                columns = {row['name'] for row in await cursor.fetchall()}
+            if 'claimed_at' not in columns:
+                await conn.execute("ALTER TABLE reminders ADD COLUMN claimed_at TEXT")
+                await conn.execute("ALTER TABLE reminders ADD COLUMN attempts INTEGER DEFAULT 0")
+            await conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reminders_remind_at ON reminders (remind_at)"
+            )
+            # Still claimed means the bot stopped mid-send: it may have gone out, so never resend it
+            async with conn.execute("SELECT id FROM reminders WHERE claimed_at IS NOT NULL") as cursor:
+                interrupted = [row[0] for row in await cursor.fetchall()]
+            if interrupted:
+                log.warning("Dropping %d reminders interrupted while sending: %s", len(interrupted), interrupted)
+                await conn.executemany("DELETE FROM reminders WHERE id = ?", [(r_id,) for r_id in interrupted])
+            # Giveaways, ended once the scheduler reaches ends_at
+            await conn.execute("""
+            CREATE TABLE IF NOT EXISTS giveaways (
+                message_id INTEGER PRIMARY KEY,
+                guild_id INTEGER,
+                channel_id INTEGER,
+                host_id INTEGER,
+                prizes TEXT,
+                winners INTEGER,
+                ends_at REAL,
+                ended INTEGER DEFAULT 0,
+                seed INTEGER,
+                results TEXT
+            )
+            """)
+            # Draw seed and winners are kept so a result can be re-checked later
+            async with conn.execute("PRAGMA table_info(giveaways)") as cursor:
+                columns = {row['name'] for row in await cursor.fetchall()}
+            if 'seed' not in columns:
+                await conn.execute("ALTER TABLE giveaways ADD COLUMN seed INTEGER")
+                await conn.execute("ALTER TABLE giveaways ADD COLUMN results TEXT")
+            await conn.execute("""
+            CREATE TABLE IF NOT EXISTS giveaway_entries (
+                message_id INTEGER,
+                user_id INTEGER,
+                PRIMARY KEY (message_id, user_id)
+            ) WITHOUT ROWID
+            """)
+
+        # Pending reminders live in the table; the heap only decides when to wake
+        async with self.db.reader() as conn:
+            async with conn.execute("SELECT id, remind_at FROM reminders ORDER BY remind_at") as cursor:
+                for r_id, remind_at in await cursor.fetchall():
+                    self.reminders.schedule(r_id, datetime.fromisoformat(remind_at).timestamp())
+
+            async with conn.execute("SELECT message_id, ends_at FROM giveaways WHERE ended = 0") as cursor:
+                for message_id, ends_at in await cursor.fetchall():
+                    self.entrants[message_id] = set()
+                    self.giveaways.schedule(message_id, ends_at)
+            async with conn.execute("""
+                SELECT e.message_id, e.user_id FROM giveaway_entries e
+                JOIN giveaways g ON g.message_id = e.message_id WHERE g.ended = 0
+            """) as cursor:
+                for message_id, user_id in await cursor.fetchall():
+                    self.entrants[message_id].add(user_id)
+
+        self._starter = asyncio.create_task(self.start_schedulers())
+
+    async def cog_unload(self):
+        if self._starter:
+            self._starter.cancel()
+        # Lets a batch being delivered finish and write its rows before the pool closes
+        await self.reminders.stop()
+        await self.giveaways.stop()
+        if self.db:
+            await self.db.close()
+
+    async def start_schedulers(self):
+        await self.bot.wait_until_ready()
+        # Reactions added while the bot was offline never produced events
+        for message_id in list(self.entrants):
+            await self.resync_entrants(message_id)
+        self.reminders.start()
+        self.giveaways.start()
 
     @app_commands.command(
         name="luck",
@@ -45,8 +142,17 @@ class Fun(commands.Cog):
         user_id = interaction.user.id
         today_str = date.today().isoformat()
 
-        c.execute("SELECT last_date FROM user_luck WHERE user_id = ?", (user_id,))
-        row = c.fetchone()
+        # Check and record in one write so two quick /luck calls can't both pass
+        async with self.db.writer() as conn:
+            async with conn.execute("SELECT last_date FROM user_luck WHERE user_id = ?", (user_id,)) as cursor:
+                row = await cursor.fetchone()
+            if not (row and row[0] == today_str):
+                await conn.execute(
+                    "INSERT INTO user_luck (user_id, last_date) VALUES (?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET last_date = ?",
+                    (user_id, today_str, today_str)
+                )
+
         if row and row[0] == today_str:
             await interaction.response.send_message(
                 "⚠️ You have already checked your luck today. Try again tomorrow!",
@@ -63,12 +169,6 @@ class Fun(commands.Cog):
             color=Color.gold(),
         )
 
-        c.execute(
-            "INSERT INTO user_luck (user_id, last_date) VALUES (?, ?) "
-            "ON CONFLICT(user_id) DO UPDATE SET last_date = ?",
-            (user_id, today_str, today_str)
-        )
-        conn.commit()
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(
@@ -81,9 +181,8 @@ class Fun(commands.Cog):
             f"https://api.giphy.com/v1/gifs/random"
             f"?api_key={GIPHY_API_KEY}&rating=R&tag=brainrot"
         )
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
-                data = await resp.json()
+        async with HttpClient.session().get(url) as resp:
+            data = await resp.json()
         gif_url = data["data"]["images"]["original"]["url"]
         await interaction.followup.send(gif_url)
 
@@ -134,30 +233,74 @@ class Fun(commands.Cog):
             return
 
         remind_at = datetime.now() + delta
-        c.execute(
-            "INSERT INTO reminders (user_id, channel_id, message, remind_at) VALUES (?, ?, ?, ?)",
-            (interaction.user.id, interaction.channel.id, message, remind_at.isoformat())
-        )
-        conn.commit()
+        async with self.db.writer() as conn:
+            cursor = await conn.execute(
+                "INSERT INTO reminders (user_id, channel_id, message, remind_at) VALUES (?, ?, ?, ?)",
+                (interaction.user.id, interaction.channel.id, message, remind_at.isoformat())
+            )
+        # Scheduled after the commit, so the row is always there when it fires
+        self.reminders.schedule(cursor.lastrowid, remind_at.timestamp())
         await interaction.response.send_message(f"⏰ Reminder set for {time} from now!", ephemeral=True)
 
-    @tasks.loop(seconds=60)
-    async def check_reminders(self):
-        now = datetime.now()
-        c.execute("SELECT id, user_id, channel_id, message FROM reminders WHERE remind_at <= ?", (now.isoformat(),))
-        rows = c.fetchall()
-        for r_id, user_id, channel_id, message in rows:
-            channel = self.bot.get_channel(channel_id)
-            user = self.bot.get_user(user_id)
-            if channel and user:
-                await channel.send(f"⏰ {user.mention}, reminder: {message}")
-            c.execute("DELETE FROM reminders WHERE id = ?", (r_id,))
-            conn.commit()
-
-    @check_reminders.before_loop
-    async def before_reminders(self):
-        await self.bot.wait_until_ready()
+    async def deliver_reminders(self, reminder_ids: list[int]):
+        """Claim and send reminders the scheduler found due
+
+        Delivered and undeliverable reminders are deleted in one transaction
+        per batch; sends that failed for a passing reason are released and
+        tried again after REMINDER_RETRY.
+        """
+        rows = []
+        claimed_at = datetime.now().isoformat()
+        async with self.db.writer() as conn:
+            for i in range(0, len(reminder_ids), SQL_BATCH):
+                chunk = reminder_ids[i:i + SQL_BATCH]
+                placeholders = ", ".join("?" * len(chunk))
+                await conn.execute(
+                    f"UPDATE reminders SET claimed_at = ? WHERE id IN ({placeholders}) AND claimed_at IS NULL",
+                    (claimed_at, *chunk)
+                )
+                async with conn.execute(
+                    f"SELECT id, user_id, channel_id, message, attempts FROM reminders "
+                    f"WHERE id IN ({placeholders}) AND claimed_at = ?",
+                    (*chunk, claimed_at)
+                ) as cursor:
+                    rows.extend(await cursor.fetchall())
+        if not rows:
+            return
 
+        slots = asyncio.Semaphore(REMINDER_CONCURRENCY)
+
+        async def send(r_id: int, user_id: int, channel_id: int, message: str, attempts: int) -> bool:
+            """True once the reminder needs no further sends"""
+            async with slots:
+                try:
+                    channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+                    # A raw mention needs no cached user
+                    await channel.send(f"⏰ <@{user_id}>, reminder: {message}")
+                    return True
+                except (discord.NotFound, discord.Forbidden):
+                    log.warning("Dropping reminder %d: channel %d is gone or closed to the bot", r_id, channel_id)
+                    return True
+                except Exception:
+                    if attempts + 1 >= REMINDER_ATTEMPTS:
+                        log.exception("Dropping reminder %d after %d failed sends", r_id, attempts + 1)
+                        return True
+                    log.warning("Failed to deliver reminder %d, retrying", r_id, exc_info=True)
+                    return False
+
+        done = await asyncio.gather(*(send(*row) for row in rows))
+
+        retry_at = datetime.now() + REMINDER_RETRY
+        finished = [(row[0],) for row, sent in zip(rows, done) if sent]
+        retries = [(retry_at.isoformat(), row[0]) for row, sent in zip(rows, done) if not sent]
+        async with self.db.writer() as conn:
+            await conn.executemany("DELETE FROM reminders WHERE id = ?", finished)
+            await conn.executemany(
+                "UPDATE reminders SET claimed_at = NULL, attempts = attempts + 1, remind_at = ? WHERE id = ?",
+                retries
+            )
+        for _, r_id in retries:
+            self.reminders.schedule(r_id, retry_at.timestamp())
 
     @app_commands.command(
         name="giveaway",
@@ -209,11 +352,17 @@ class Fun(commands.Cog):
             await interaction.response.send_message("⚠️ Total chance must be greater than 0.", ephemeral=True)
             return
 
+        if winners < 1:
+            await interaction.response.send_message("⚠️ Winners must be at least 1.", ephemeral=True)
+            return
+
+        # Discord renders the countdown client-side, so the message is never edited to tick
+        ends_at = int(datetime.now().timestamp()) + delta_seconds
         embed = Embed(
             title="🎉 Giveaway Started!",
             description=(
-                f"React with 🎉 to enter!\n"
-                f"Duration: {duration}\n"
+                f"React with {GIVEAWAY_EMOJI} to enter!\n"
+                f"Ends: <t:{ends_at}:R> (<t:{ends_at}:f>)\n"
                 f"Winners: {winners}\n"
                 f"Prizes: {', '.join([p[0] for p in prize_list])}\n\n"
             ),
@@ -221,54 +370,113 @@ class Fun(commands.Cog):
         )
         await interaction.response.send_message(embed=embed)
         message = await interaction.original_response()
-        await message.add_reaction("🎉")
 
-        for remaining in range(delta_seconds, 0, -10):
+        self.entrants[message.id] = set()
+        async with self.db.writer() as conn:
+            await conn.execute(
+                "INSERT INTO giveaways (message_id, guild_id, channel_id, host_id, prizes, winners, ends_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (message.id, interaction.guild_id, interaction.channel_id, interaction.user.id,
+                 json.dumps(prize_list), winners, ends_at)
+            )
+        self.giveaways.schedule(message.id, ends_at)
+        await message.add_reaction(GIVEAWAY_EMOJI)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        entrants = self.entrants.get(payload.message_id)
+        if entrants is None or str(payload.emoji) != GIVEAWAY_EMOJI:
+            return
+        if payload.member is None or payload.member.bot or payload.user_id in entrants:
+            return
+
+        entrants.add(payload.user_id)
+        async with self.db.writer() as conn:
+            await conn.execute(
+                "INSERT OR IGNORE INTO giveaway_entries (message_id, user_id) VALUES (?, ?)",
+                (payload.message_id, payload.user_id)
+            )
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        entrants = self.entrants.get(payload.message_id)
+        if entrants is None or str(payload.emoji) != GIVEAWAY_EMOJI or payload.user_id not in entrants:
+            return
+
+        entrants.discard(payload.user_id)
+        async with self.db.writer() as conn:
+            await conn.execute(
+                "DELETE FROM giveaway_entries WHERE message_id = ? AND user_id = ?",
+                (payload.message_id, payload.user_id)
+            )
+
+    async def resync_entrants(self, message_id: int):
+        """Rebuild one running giveaway's entrants from its reactions"""
+        async with self.db.reader() as conn:
+            async with conn.execute(
+                "SELECT channel_id FROM giveaways WHERE message_id = ?", (message_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+        channel = self.bot.get_channel(row[0]) if row else None
+        if channel is None:
+            return
+
+        try:
+            message = await channel.fetch_message(message_id)
+            reaction = discord.utils.get(message.reactions, emoji=GIVEAWAY_EMOJI)
+            users = {u.id async for u in reaction.users() if not u.bot} if reaction else set()
+        except discord.HTTPException:
+            log.warning("Could not resync giveaway %d", message_id, exc_info=True)
+            return
+
+        self.entrants[message_id] = users
+        async with self.db.writer() as conn:
+            await conn.execute("DELETE FROM giveaway_entries WHERE message_id = ?", (message_id,))
+            await conn.executemany(
+                "INSERT INTO giveaway_entries (message_id, user_id) VALUES (?, ?)",
+                [(message_id, user_id) for user_id in users]
+            )
+
+    async def end_giveaways(self, message_ids: list[int]):
+        for message_id in message_ids:
             try:
-                minutes, seconds = divmod(remaining, 60)
-                hours, minutes = divmod(minutes, 60)
-                time_str = f"{hours}h {minutes}m {seconds}s"
-
-                if hours:
-                    time_str = f"{hours}h {minutes}m {seconds}s"
-                elif minutes:
-                    time_str = f"{minutes}m {seconds}s"
-                else:
-                    time_str = f"{seconds}s"
-
-                embed.set_footer(text=f"⏳ Time left: {time_str}")
-                await message.edit(embed=embed)
-                await asyncio.sleep(min(10, remaining))
-            except discord.NotFound:
-                break 
-
-        message = await interaction.channel.fetch_message(message.id)
-        reaction = discord.utils.get(message.reactions, emoji="🎉")
-        if not reaction:
-            await interaction.followup.send("No participants, giveaway cancelled.")
+                await self.end_giveaway(message_id)
+            except Exception:
+                log.exception("Failed to end giveaway %d", message_id)
+
+    async def end_giveaway(self, message_id: int):
+        """Draw and announce the winners of a giveaway that reached its end time"""
+        users = self.entrants.get(message_id, set())
+
+        # Claim, draw and record in one write: a crash can skip an announcement but never repeat one
+        async with self.db.writer() as conn:
+            async with conn.execute(
+                "SELECT channel_id, prizes, winners FROM giveaways WHERE message_id = ? AND ended = 0",
+                (message_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                return
+
+            channel_id, prizes, winners = row
+            result = draw(users, json.loads(prizes), winners)
+            await conn.execute(
+                "UPDATE giveaways SET ended = 1, seed = ?, results = ? WHERE message_id = ?",
+                (result.seed, json.dumps(result.winners), message_id)
+            )
+        self.entrants.pop(message_id, None)
+
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
             return
 
-        users = [u async for u in reaction.users() if not u.bot]
-        if not users:
-            await interaction.followup.send("No participants, giveaway cancelled.")
+        if not result.winners:
+            await channel.send("No participants, giveaway cancelled.")
             return
 
-        winners_results = []
-        for prize_name, chance in prize_list:
-            eligible_users = users.copy()
-            if not eligible_users:
-                break
-            for _ in range(winners):
-                winner = random.choices(
-                    population=eligible_users,
-                    weights=[chance]*len(eligible_users),
-                    k=1
-                )[0]
-                winners_results.append((winner, prize_name))
-                eligible_users.remove(winner)
-
-        result_text = "\n".join(f"🎁 {winner.mention} won **{prize}**!" for winner, prize in winners_results)
-        await interaction.followup.send(result_text)
+        result_text = "\n".join(f"🎁 <@{winner_id}> won **{prize}**!" for winner_id, prize in result.winners)
+        await channel.send(f"{result_text}\n-# Draw seed: {result.seed}")
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Fun(bot))
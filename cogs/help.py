@@ -2,7 +2,7 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
-RPG_COGS = ["ProfileCommands", "EconomyCommands", "ShopCommands", "CombatCommands", "BackgroundTasks"]
+RPG_COGS = ["ProfileCommands", "EconomyCommands", "ShopCommands", "CombatCommands"]
 
 class Help(commands.Cog):
     def __init__(self, bot: commands.Bot):
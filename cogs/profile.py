@@ -3,16 +3,26 @@ from discord.ext import commands
 from discord import app_commands, Embed, Color
 from typing import Literal
 from services.user_service import UserService
+from services.leaderboard_service import LeaderboardService
 from services.inventory_service import InventoryService
+from utils.component_router import ComponentRouter
 from utils.profile_card_gen import ProfileCardGenerator
 from view.profile import ProfileView
 
+PAGE_SIZE = 10
+
 class ProfileCommands(commands.Cog):
     """Profile and status commands"""
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
     
+    async def cog_load(self):
+        ComponentRouter.register(self.bot, "profile", self.show_profile_page)
+    
+    async def cog_unload(self):
+        ComponentRouter.unregister("profile", self.show_profile_page)
+    
     @app_commands.command(name="profile", description="View RPG profile with interactive UI")
     async def profile(self, interaction: discord.Interaction, user: discord.User = None):
         await interaction.response.defer()
@@ -26,12 +36,8 @@ class ProfileCommands(commands.Cog):
             await interaction.followup.send("❌ Profile not found!", ephemeral=True)
             return
         
-        inventory = await InventoryService.get_inventory(target.id)
-        inventory_count = len(inventory)
-        equipped = await InventoryService.get_equipped_items(target.id)
-        
-        # Create profile view
-        view = ProfileView(user_data, target, inventory_count, equipped)
+        # Create profile view; inventory is only loaded when that page is opened
+        view = ProfileView(user_data, target.avatar.url if target.avatar else None)
         
         # Create initial embed
         embed = view.create_stats_embed()
@@ -44,18 +50,43 @@ class ProfileCommands(commands.Cog):
         else:
             await interaction.followup.send(embed=embed, view=view)
     
+    async def show_profile_page(self, interaction: discord.Interaction, user_id: int, page: str):
+        """Route handler for profile buttons, rebuilt from the user cache on each click"""
+        user_data = await UserService.get_user(user_id)
+        if not user_data:
+            await interaction.response.send_message("❌ Profile not found!", ephemeral=True)
+            return
+        
+        # The message already carries the avatar, so no user lookup is needed
+        embeds = interaction.message.embeds
+        avatar_url = embeds[0].thumbnail.url if embeds else None
+        
+        if page == "inventory":
+            inventory = await InventoryService.get_inventory(user_id)
+            equipped = await InventoryService.get_equipped_items(user_id)
+            view = ProfileView(user_data, avatar_url, len(inventory), equipped)
+        else:
+            view = ProfileView(user_data, avatar_url)
+        
+        # The buttons never change, so only the embed is sent
+        await interaction.response.edit_message(embed=view.create_page_embed(page))
+    
     @app_commands.command(name="leaderboard", description="View top players")
     async def leaderboard(
         self,
         interaction: discord.Interaction,
-        category: Literal["level", "coins", "pvp", "bosses"] = "level"
+        category: Literal["level", "coins", "pvp", "bosses"] = "level",
+        page: app_commands.Range[int, 1] = 1
     ):
         await interaction.response.defer()
         
-        rows = await UserService.get_leaderboard(category, 10)
+        offset = (page - 1) * PAGE_SIZE
+        rows, total = await LeaderboardService.get_page(category, offset, PAGE_SIZE)
+        pages = max(1, -(-total // PAGE_SIZE))
         
         if not rows:
-            await interaction.followup.send("📊 No data yet!", ephemeral=True)
+            message = "📊 No data yet!" if not total else f"📊 Only {pages} page(s) of players."
+            await interaction.followup.send(message, ephemeral=True)
             return
         
         # Format based on category
@@ -74,7 +105,7 @@ class ProfileCommands(commands.Cog):
         
         # Create leaderboard with medals
         desc_lines = []
-        for i, r in enumerate(rows):
+        for i, r in enumerate(rows, start=offset):
             if i == 0:
                 medal = "🥇"
             elif i == 1:
@@ -89,7 +120,10 @@ class ProfileCommands(commands.Cog):
         desc = "\n".join(desc_lines)
         
         embed = Embed(title=title, description=desc, color=Color.gold())
-        embed.set_footer(text=f"Showing top {len(rows)} players • Updated in real-time")
+        
+        rank = await LeaderboardService.get_rank(category, interaction.user.id)
+        rank_text = f"Your rank: #{rank:,} of {total:,}" if rank else "You are not ranked yet"
+        embed.set_footer(text=f"Page {page}/{pages} • {rank_text}")
         
         await interaction.followup.send(embed=embed)
 
@@ -1,3 +1,7 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
 import discord
 import aiosqlite
 from discord import app_commands
@@ -5,6 +9,15 @@ from discord.ext import commands
 from utils.permissions import has_role_slash
 
 DB_PATH = "reaction_roles.db"
+PUBLISH_WORKERS = 3      # menus seeded at once; reactions within a menu stay in order
+PROGRESS_INTERVAL = 2.0  # seconds between progress edits (and checkpoints) while seeding
+ROLE_DEBOUNCE = 1.5      # quiet time before a member's queued role changes are applied
+ROLE_MAX_DELAY = 5.0     # apply anyway once the first change has waited this long
+ROLE_EDITS_GLOBAL = 10   # member edits in flight across all guilds
+ROLE_EDITS_PER_GUILD = 3 # ... and within one guild
+
+# Debug output is off unless LOG_LEVEL=DEBUG; records go through the bot's log queue
+log = logging.getLogger(__name__)
 
 
 def normalize_emoji(emoji: discord.PartialEmoji | str) -> str:
@@ -18,10 +31,169 @@ def normalize_emoji(emoji: discord.PartialEmoji | str) -> str:
     return str(emoji)
 
 
+@dataclass
+class PendingRoles:
+    """Role changes queued for one member since their last edit"""
+    add: set[int] = field(default_factory=set)
+    remove: set[int] = field(default_factory=set)
+    events: int = 0
+    first_at: float = 0.0
+    due: float = 0.0
+
+
+@dataclass
+class MemberEdits:
+    """Serializes one member's edits while any are queued or in flight"""
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    users: int = 0
+    # Returned by the last edit; fresher than the cache until the gateway catches up
+    member: discord.Member | None = None
+
+
+class RoleBatcher:
+    """Coalesces a member's reaction role toggles into one member.edit(roles=...)"""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._pending: dict[tuple[int, int], PendingRoles] = {}
+        self._timers: dict[tuple[int, int], asyncio.Task] = {}
+        self._members: dict[tuple[int, int], MemberEdits] = {}
+        self._global = asyncio.Semaphore(ROLE_EDITS_GLOBAL)
+        self._guilds: dict[int, asyncio.Semaphore] = {}
+        self.events = 0
+        self.edits = 0
+        # Toggles carried by successful edits, and by batches that changed nothing
+        self.edited_events = 0
+        self.noops = 0
+        self.noop_events = 0
+        self.failures = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def queue(self, guild_id: int, member_id: int, role_id: int, add: bool):
+        """Record one toggle; the latest toggle of a role wins"""
+        key = (guild_id, member_id)
+        now = time.monotonic()
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = self._pending[key] = PendingRoles(first_at=now)
+
+        if add:
+            entry.remove.discard(role_id)
+            entry.add.add(role_id)
+        else:
+            entry.add.discard(role_id)
+            entry.remove.add(role_id)
+        entry.events += 1
+        entry.due = min(now + ROLE_DEBOUNCE, entry.first_at + ROLE_MAX_DELAY)
+        self.events += 1
+
+        if key not in self._timers:
+            self._timers[key] = asyncio.create_task(self._wait_and_apply(key))
+
+    async def flush(self):
+        """Apply every queued change now, and wait for edits already in flight"""
+        # Timers leave _timers before applying, so only sleeping ones are cancelled
+        for task in self._timers.values():
+            task.cancel()
+        self._timers.clear()
+        await asyncio.gather(*(self._apply(key) for key in list(self._pending)))
+        for edits in list(self._members.values()):
+            async with edits.lock:
+                pass
+
+    def stats(self) -> dict[str, int]:
+        """Batching counters
+
+        ``coalesced`` is reaction events that rode along in another event's
+        edit; events whose batch needed no edit are ``noop_events`` instead.
+        """
+        return {
+            'events': self.events,
+            'edits': self.edits,
+            'coalesced': self.edited_events - self.edits,
+            'noops': self.noops,
+            'noop_events': self.noop_events,
+            'failures': self.failures,
+            'pending': len(self._pending)
+        }
+
+    async def _wait_and_apply(self, key: tuple[int, int]):
+        # Each new toggle pushes `due` back, so sleep until it stops moving
+        while True:
+            # An edit that was waiting for its turn may have taken the entry already
+            entry = self._pending.get(key)
+            if entry is None:
+                break
+            delay = entry.due - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        self._timers.pop(key, None)
+        await self._apply(key)
+
+    async def _apply(self, key: tuple[int, int]):
+        edits = self._members.get(key)
+        if edits is None:
+            edits = self._members[key] = MemberEdits()
+        edits.users += 1
+        try:
+            # One edit per member at a time: each full role list builds on the last
+            async with edits.lock:
+                guild_slots = self._guilds.setdefault(key[0], asyncio.Semaphore(ROLE_EDITS_PER_GUILD))
+                async with self._global, guild_slots:
+                    # Taken only now, so toggles made while waiting join this edit
+                    entry = self._pending.pop(key, None)
+                    if entry is not None:
+                        await self._edit(key, entry, edits)
+        finally:
+            edits.users -= 1
+            if not edits.users:
+                del self._members[key]
+
+    async def _edit(self, key: tuple[int, int], entry: PendingRoles, edits: MemberEdits):
+        guild_id, member_id = key
+        guild = self.bot.get_guild(guild_id)
+        member = edits.member or (guild.get_member(member_id) if guild else None)
+        if member is None:
+            self.failures += entry.events
+            return
+
+        # Same full-list edit discord.py's add_roles(atomic=False) makes, skipping @everyone
+        current = {role.id for role in member.roles[1:]}
+        wanted = (current | entry.add) - entry.remove
+        if wanted == current:
+            self.noops += 1
+            self.noop_events += entry.events
+            return
+
+        roles = [role for role in map(guild.get_role, wanted) if role is not None]
+        try:
+            edited = await member.edit(roles=roles, reason="Reaction roles updated")
+            edits.member = edited or edits.member
+            self.edits += 1
+            self.edited_events += entry.events
+            log.debug("Applied %d role toggles for %s in one edit", entry.events, member)
+        except discord.Forbidden as e:
+            self.failures += entry.events
+            log.warning("Permission denied changing roles for %s: %s", member, e)
+        except discord.HTTPException as e:
+            self.failures += entry.events
+            log.warning("HTTP error changing roles for %s: %s", member, e)
+
+
 class ReactionRoles(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.db: aiosqlite.Connection | None = None
+        # Tracked message id -> {normalized emoji -> role id}; mirrors the two tables
+        self.routes: dict[int, dict[str, int]] = {}
+        # Menu message ids whose reactions still need adding
+        self.publish_queue: asyncio.Queue[int] = asyncio.Queue()
+        self._queued: set[int] = set()
+        self._tasks: list[asyncio.Task] = []
+        self.role_batcher = RoleBatcher(bot)
 
     # -------------------------------------------------
     # LIFECYCLE
@@ -56,12 +228,150 @@ class ReactionRoles(commands.Cog):
             """
         )
 
+        # Reactions still to be added to published menus, so seeding survives restarts
+        await self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS reaction_role_publish (
+                message_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                position   INTEGER NOT NULL,
+                emoji      TEXT    NOT NULL,
+                PRIMARY KEY(message_id, position)
+            )
+            """
+        )
+
         await self.db.commit()
+        await self.load_routes()
+        self._tasks.append(asyncio.create_task(self.start_publishing()))
 
     async def cog_unload(self):
+        # Unfinished menus keep their publish rows and resume on the next load
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        await self.role_batcher.flush()
+        log.info("Reaction role batching stats: %s", self.role_batcher.stats())
         if self.db:
             await self.db.close()
 
+    async def start_publishing(self):
+        await self.bot.wait_until_ready()
+        cursor = await self.db.execute("SELECT DISTINCT message_id FROM reaction_role_publish")
+        for (message_id,) in await cursor.fetchall():
+            self.queue_publish(message_id)
+        for _ in range(PUBLISH_WORKERS):
+            self._tasks.append(asyncio.create_task(self.publish_worker()))
+
+    def queue_publish(self, message_id: int):
+        if message_id not in self._queued:
+            self._queued.add(message_id)
+            self.publish_queue.put_nowait(message_id)
+
+    async def publish_worker(self):
+        while True:
+            message_id = await self.publish_queue.get()
+            try:
+                await self.seed_reactions(message_id)
+            except Exception:
+                log.exception("Failed to seed reactions for menu %s", message_id)
+            finally:
+                self._queued.discard(message_id)
+                self.publish_queue.task_done()
+
+    async def seed_reactions(self, message_id: int):
+        """Add a menu's outstanding reactions in order, checkpointing progress as it goes"""
+        cursor = await self.db.execute(
+            """
+            SELECT channel_id, position, emoji FROM reaction_role_publish
+            WHERE message_id = ? ORDER BY position
+            """,
+            (message_id,),
+        )
+        rows = await cursor.fetchall()
+        if not rows:
+            return
+
+        channel = self.bot.get_channel(rows[0][0])
+        if channel is None:
+            log.warning("Channel for menu %s is gone; dropping its reactions", message_id)
+            await self.checkpoint(message_id)
+            return
+
+        # Partial messages can be reacted to and edited without fetching them first
+        message = channel.get_partial_message(message_id)
+        total = rows[-1][1] + 1
+        last_report = time.monotonic()
+
+        for _, position, emoji in rows:
+            try:
+                # discord.py waits out the reaction route's rate limit bucket itself
+                await message.add_reaction(emoji)
+                log.debug("Added reaction: %s", emoji)
+            except discord.NotFound:
+                log.warning("Menu %s was deleted while seeding", message_id)
+                await self.checkpoint(message_id)
+                return
+            except discord.HTTPException as e:
+                log.warning("Failed to add reaction %s: %s", emoji, e)
+
+            done = position + 1
+            if done < total and time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                last_report = time.monotonic()
+                # Re-adding a reaction is a no-op, so a crash here only repeats a few calls
+                await self.checkpoint(message_id, done)
+                await self.report_progress(message, done, total)
+
+        await self.checkpoint(message_id)
+        await self.report_progress(message, total, total)
+
+    async def checkpoint(self, message_id: int, done: int | None = None):
+        """Forget publish rows before position ``done``, or all of them"""
+        if done is None:
+            await self.db.execute("DELETE FROM reaction_role_publish WHERE message_id = ?", (message_id,))
+        else:
+            await self.db.execute(
+                "DELETE FROM reaction_role_publish WHERE message_id = ? AND position < ?",
+                (message_id, done),
+            )
+        await self.db.commit()
+
+    async def report_progress(self, message: discord.PartialMessage, done: int, total: int):
+        try:
+            if done < total:
+                await message.edit(content=f"⏳ Adding reactions… {done}/{total}")
+            else:
+                await message.edit(content=None)
+        except discord.HTTPException as e:
+            log.debug("Could not update progress on menu %s: %s", message.id, e)
+
+    async def load_routes(self, message_id: int | None = None):
+        """Rebuild the routing table, or just one message's entry, from the database"""
+        query = """
+            SELECT m.message_id, r.emoji, r.role_id
+            FROM reaction_role_messages m
+            LEFT JOIN reaction_roles r ON r.message_id = m.message_id
+        """
+        params: tuple = ()
+        if message_id is not None:
+            query += " WHERE m.message_id = ?"
+            params = (message_id,)
+
+        cursor = await self.db.execute(query, params)
+        rows = await cursor.fetchall()
+
+        if message_id is None:
+            self.routes.clear()
+        else:
+            self.routes.pop(message_id, None)
+
+        for msg_id, emoji, role_id in rows:
+            routes = self.routes.setdefault(msg_id, {})
+            if emoji is not None:
+                # Keyed the way handle_reaction normalizes payload emoji
+                routes[normalize_emoji(discord.PartialEmoji.from_str(emoji))] = role_id
+
     # -------------------------------------------------
     # ADD
     # -------------------------------------------------
@@ -152,9 +462,9 @@ class ReactionRoles(commands.Cog):
     async def roles(self, interaction: discord.Interaction):
         try:
             # Defer immediately to prevent timeout
-            print(f"[DEBUG] Starting /roles command for guild {interaction.guild_id}")
+            log.debug("Starting /roles command for guild %s", interaction.guild_id)
             await interaction.response.defer()
-            print("[DEBUG] Deferred successfully")
+            log.debug("Deferred successfully")
             
             guild = interaction.guild
             channel = interaction.channel
@@ -166,7 +476,7 @@ class ReactionRoles(commands.Cog):
                 )
                 return
 
-            print("[DEBUG] Fetching roles from database...")
+            log.debug("Fetching roles from database")
             cursor = await self.db.execute(
                 """
                 SELECT DISTINCT emoji, role_id
@@ -177,7 +487,7 @@ class ReactionRoles(commands.Cog):
                 (guild.id,),
             )
             rows = await cursor.fetchall()
-            print(f"[DEBUG] Found {len(rows)} reaction roles")
+            log.debug("Found %d reaction roles", len(rows))
 
             if not rows:
                 await interaction.followup.send(
@@ -208,30 +518,22 @@ class ReactionRoles(commands.Cog):
                 color=discord.Color.blurple(),
             )
 
-            print(f"[DEBUG] Sending embed with {len(emojis)} emojis...")
-            message = await interaction.followup.send(embed=embed, wait=True)
-            print(f"[DEBUG] Message sent with ID: {message.id}")
-
-            # Add reactions
-            for emoji in emojis:
-                try:
-                    await message.add_reaction(emoji)
-                    print(f"[DEBUG] Added reaction: {emoji}")
-                except discord.HTTPException as e:
-                    print(f"[ERROR] Failed to add reaction {emoji}: {e}")
-
-            # Update all reaction_roles entries to link to this message
-            for emoji in emojis:
-                await self.db.execute(
-                    """
-                    UPDATE reaction_roles
-                    SET message_id = ?, channel_id = ?
-                    WHERE guild_id = ? AND emoji = ? AND message_id = 0
-                    """,
-                    (message.id, channel.id, guild.id, emoji),
-                )
+            log.debug("Sending embed with %d emojis", len(emojis))
+            message = await interaction.followup.send(
+                content=f"⏳ Adding reactions… 0/{len(emojis)}", embed=embed, wait=True
+            )
+            log.debug("Message sent with ID: %s", message.id)
 
-            # Track this message
+            # Bind the pending entries, track the menu and queue its reactions in one commit
+            placeholders = ", ".join("?" * len(emojis))
+            await self.db.execute(
+                f"""
+                UPDATE reaction_roles
+                SET message_id = ?, channel_id = ?
+                WHERE guild_id = ? AND message_id = 0 AND emoji IN ({placeholders})
+                """,
+                (message.id, channel.id, guild.id, *emojis),
+            )
             await self.db.execute(
                 """
                 INSERT OR IGNORE INTO reaction_role_messages (guild_id, channel_id, message_id)
@@ -239,13 +541,21 @@ class ReactionRoles(commands.Cog):
                 """,
                 (guild.id, channel.id, message.id),
             )
+            await self.db.executemany(
+                """
+                INSERT INTO reaction_role_publish (message_id, channel_id, position, emoji)
+                VALUES (?, ?, ?, ?)
+                """,
+                [(message.id, channel.id, position, emoji) for position, emoji in enumerate(emojis)],
+            )
             await self.db.commit()
-            print("[DEBUG] Database updated successfully")
+            await self.load_routes(message.id)
+            log.debug("Database updated successfully")
+
+            self.queue_publish(message.id)
             
-        except Exception as e:
-            print(f"[ERROR] Exception in /roles command: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            log.exception("Exception in /roles command")
             raise
 
     # -------------------------------------------------
@@ -300,6 +610,7 @@ class ReactionRoles(commands.Cog):
             (int(message_id), emoji_key),
         )
         await self.db.commit()
+        await self.load_routes(int(message_id))
 
         await interaction.response.send_message(
             "🗑️ Reaction role removed.", ephemeral=True
@@ -329,6 +640,7 @@ class ReactionRoles(commands.Cog):
             (new_role.id, int(message_id), emoji_key),
         )
         await self.db.commit()
+        await self.load_routes(int(message_id))
 
         await interaction.response.send_message(
             f"✏️ Updated {emoji} → {new_role.mention}", ephemeral=True
@@ -347,72 +659,46 @@ class ReactionRoles(commands.Cog):
         await self.handle_reaction(payload, add=False)
 
     async def handle_reaction(self, payload: discord.RawReactionActionEvent, add: bool):
-        print(f"[DEBUG REACTION] Received reaction event: add={add}, user={payload.user_id}, emoji={payload.emoji}")
-        
-        # Ignore bot's own reactions
-        if not self.db or payload.user_id == self.bot.user.id:
-            print("[DEBUG REACTION] Ignoring - bot's own reaction or no db")
+        # Most reactions are on untracked messages; drop them before any other work
+        routes = self.routes.get(payload.message_id)
+        if routes is None:
             return
+
+        log.debug("Reaction event: add=%s, user=%s, emoji=%s", add, payload.user_id, payload.emoji)
         
-        # Check if this message is tracked as a reaction role message
-        cursor = await self.db.execute(
-            """
-            SELECT 1 FROM reaction_role_messages
-            WHERE message_id = ?
-            """,
-            (payload.message_id,),
-        )
-        is_tracked = await cursor.fetchone()
-        print(f"[DEBUG REACTION] Message tracked: {is_tracked is not None}")
-        if not is_tracked:
+        # Ignore bot's own reactions
+        if payload.user_id == self.bot.user.id:
+            log.debug("Ignoring the bot's own reaction")
             return
         
         guild = self.bot.get_guild(payload.guild_id)
         if not guild:
-            print("[DEBUG REACTION] Guild not found")
+            log.debug("Guild %s not found", payload.guild_id)
             return
         
         member = guild.get_member(payload.user_id)
         if not member:
-            print("[DEBUG REACTION] Member not found")
+            log.debug("Member %s not found", payload.user_id)
             return
         
         # Normalize the emoji from the reaction
         emoji_key = normalize_emoji(payload.emoji)
-        print(f"[DEBUG REACTION] Normalized emoji: {emoji_key}")
+        log.debug("Normalized emoji: %s", emoji_key)
         
         # Look up role for this emoji and message
-        cursor = await self.db.execute(
-            """
-            SELECT role_id
-            FROM reaction_roles
-            WHERE message_id = ? AND emoji = ?
-            """,
-            (payload.message_id, emoji_key),
-        )
-        role_row = await cursor.fetchone()
-        print(f"[DEBUG REACTION] Role found in DB: {role_row}")
+        role_id = routes.get(emoji_key)
+        log.debug("Role found in routes: %s", role_id)
         
-        if not role_row:
+        if role_id is None:
             return
         
-        role = guild.get_role(role_row[0])
+        role = guild.get_role(role_id)
         if not role:
-            print(f"[DEBUG REACTION] Role {role_row[0]} not found in guild")
+            log.debug("Role %s not found in guild", role_id)
             return
         
-        print(f"[DEBUG REACTION] Attempting to {'add' if add else 'remove'} role {role.name} to/from {member.name}")
-        try:
-            if add:
-                await member.add_roles(role, reason="Reaction role assigned")
-                print(f"[DEBUG REACTION] ✅ Successfully added role {role.name}")
-            else:
-                await member.remove_roles(role, reason="Reaction role removed")
-                print(f"[DEBUG REACTION] ✅ Successfully removed role {role.name}")
-        except discord.Forbidden as e:
-            print(f"[DEBUG REACTION] ❌ Permission denied: {e}")
-        except discord.HTTPException as e:
-            print(f"[DEBUG REACTION] ❌ HTTP error: {e}")
+        log.debug("Queueing %s of role %s for %s", "add" if add else "removal", role.name, member.name)
+        self.role_batcher.queue(guild.id, member.id, role.id, add)
 
 
 async def setup(bot: commands.Bot):
@@ -3,18 +3,20 @@ from .economy import EconomyCommands
 from .shop import ShopCommands
 from .combat import CombatCommands
 from .event_listener import EventListener
-from .tasks import BackgroundTasks
 from database.db_manager import DatabaseManager
+from services.quest_service import QuestService
+from services.shop_service import ShopService
 
 async def setup(bot):
     """Setup function to load all RPG-related cogs"""
     await DatabaseManager.init_db()
+    await ShopService.load_catalog()
+    await QuestService.load_catalog()
 
     await bot.add_cog(ProfileCommands(bot))
     await bot.add_cog(EconomyCommands(bot))
     await bot.add_cog(ShopCommands(bot))
     await bot.add_cog(CombatCommands(bot))
     await bot.add_cog(EventListener(bot))
-    await bot.add_cog(BackgroundTasks(bot))
 
     print("✅ RPG system loaded successfully!")
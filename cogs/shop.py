@@ -5,7 +5,9 @@ from discord.ext import commands
 from services.user_service import UserService
 from services.inventory_service import InventoryService
 from services.shop_service import ShopService
-from utils.pagination import paginate_shop
+from database.db_manager import DatabaseManager
+from utils.component_router import ComponentRouter
+from utils.pagination import paginate_shop, turn_shop_page
 
 class ShopCommands(commands.Cog):
     """Shop and inventory commands"""
@@ -13,6 +15,15 @@ class ShopCommands(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
     
+    async def cog_load(self):
+        ComponentRouter.register(self.bot, "shop", self.turn_page)
+    
+    async def cog_unload(self):
+        ComponentRouter.unregister("shop", self.turn_page)
+    
+    async def turn_page(self, interaction: discord.Interaction, index: int, direction: str):
+        await turn_shop_page(interaction, ShopService.get_all_items(), index, direction)
+    
     @app_commands.command(name="shop", description="Browse/buy items")
     async def shop(self, interaction: discord.Interaction, item: str = None):
         if item:
@@ -26,21 +37,21 @@ class ShopCommands(commands.Cog):
             item_data = result['item']
             embed = Embed(
                 title="✅ Purchase Success!",
-                description=f"Bought **{item}** for {item_data['price']:,} coins",
+                description=f"Bought **{item}** for {item_data.price:,} coins",
                 color=Color.green()
             )
-            embed.add_field(name="Info", value=item_data['description'])
+            embed.add_field(name="Info", value=item_data.description)
             
-            if item_data['item_type'] != 'consumable':
+            if not item_data.is_consumable():
                 embed.add_field(
                     name="Bonus",
-                    value=f"+{item_data['bonus_value']} {item_data['stat_bonus']}"
+                    value=f"+{item_data.bonus_value} {item_data.stat_bonus}"
                 )
             
             await interaction.response.send_message(embed=embed)
         else:
             # List shop
-            items = await ShopService.get_all_items()
+            items = ShopService.get_all_items()
             if not items:
                 await interaction.response.send_message("🛒 Shop empty.", ephemeral=True)
                 return
@@ -49,7 +60,7 @@ class ShopCommands(commands.Cog):
             
     @app_commands.command(name="inventory", description="View inventory")
     async def inventory(self, interaction: discord.Interaction):
-        items = InventoryService.get_inventory(interaction.user.id)
+        items = await InventoryService.get_inventory(interaction.user.id)
         
         if not items:
             await interaction.response.send_message("🎒 Empty inventory!", ephemeral=True)
@@ -76,7 +87,7 @@ class ShopCommands(commands.Cog):
     
     @app_commands.command(name="equip", description="Equip item")
     async def equip(self, interaction: discord.Interaction, item: str):
-        result = InventoryService.equip_item(interaction.user.id, item)
+        result = await InventoryService.equip_item(interaction.user.id, item)
         
         if not result['success']:
             await interaction.response.send_message(f"❌ {result['error']}", ephemeral=True)
@@ -89,37 +100,43 @@ class ShopCommands(commands.Cog):
     @app_commands.command(name="use", description="Use consumable")
     async def use_item(self, interaction: discord.Interaction, item: str):
         # Get item info
-        shop_item = await ShopService.get_item(item)
+        shop_item = ShopService.get_item(item)
+        usable = shop_item is not None and shop_item.is_consumable()
+        
+        async with DatabaseManager.transaction() as uow:
+            # Check if user has it
+            has_item = False
+            if usable:
+                inventory = await InventoryService.get_inventory(interaction.user.id, uow=uow)
+                has_item = any(i['item'] == item for i in inventory)
+            
+            # Get user HP
+            user = await UserService.get_user(interaction.user.id, uow=uow) if has_item else None
+            
+            # Use item
+            if user and not user.is_full_hp():
+                heal = min(shop_item.bonus_value, user.max_hp - user.hp)
+                new_hp = user.hp + heal
+                
+                await UserService.update_user_stats(interaction.user.id, uow=uow, hp=new_hp)
+                await InventoryService.remove_item(interaction.user.id, item, 1, uow=uow)
+        
         if not shop_item:
             await interaction.response.send_message("❌ Item not found.", ephemeral=True)
             return
         
-        if shop_item['item_type'] != 'consumable':
+        if not usable:
             await interaction.response.send_message("❌ Use /equip instead.", ephemeral=True)
             return
         
-        # Check if user has it
-        inventory = InventoryService.get_inventory(interaction.user.id)
-        has_item = any(i['item'] == item for i in inventory)
-        
         if not has_item:
             await interaction.response.send_message("❌ Don't own this.", ephemeral=True)
             return
         
-        # Get user HP
-        user = UserService.get_user(interaction.user.id)
-        
         if user.is_full_hp():
             await interaction.response.send_message("❌ Already full HP!", ephemeral=True)
             return
         
-        # Use item
-        heal = min(shop_item['bonus_value'], user.max_hp - user.hp)
-        new_hp = user.hp + heal
-        
-        UserService.update_user_stats(interaction.user.id, hp=new_hp)
-        InventoryService.remove_item(interaction.user.id, item, 1)
-        
         embed = Embed(
             title="✨ Item Used!",
             description=f"Used **{item}** and restored **{heal} HP**!",
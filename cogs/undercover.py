@@ -1,87 +1,165 @@
 from __future__ import annotations
+import logging
 import random
+import time
+from collections import Counter
 import discord
 from discord import app_commands
 from discord.ext import commands
 from data.word_pairs import WORD_PAIRS
+from utils.component_router import ComponentRouter, RoutedView
+from utils.fanout import fan_out
+from utils.scheduler import Scheduler
+
+# Games with no joins, starts or votes for this long are dropped
+SESSION_TIMEOUT = 30 * 60
+
+log = logging.getLogger(__name__)
+
+class JoinView(RoutedView):
+    """Lobby view: Join / Leave / Start buttons, routed as ``undercover:<channel id>:<action>``."""
+    def __init__(self, channel_id: int):
+        super().__init__()
+        self.add_route("undercover", channel_id, "join", label="Join", style=discord.ButtonStyle.success, emoji="➕")
+        self.add_route("undercover", channel_id, "leave", label="Leave", style=discord.ButtonStyle.secondary, emoji="➖")
+        self.add_route("undercover", channel_id, "start", label="Start Game", style=discord.ButtonStyle.primary, emoji="🎲")
+
+class UndercoverGame:
+    """State of one channel's game; votes are tallied as they arrive"""
+    __slots__ = ("channel_id", "players", "started", "undercover", "votes", "counts", "round", "last_active")
+
+    def __init__(self, channel_id: int):
+        self.channel_id = channel_id
+        self.players: dict[int, discord.abc.User] = {}
+        self.started = False
+        self.undercover: int | None = None
+        # voter id -> target id, and target id -> votes received this round
+        self.votes: dict[int, int] = {}
+        self.counts: Counter[int] = Counter()
+        self.round = 0
+        self.last_active = time.time()
+
+    def touch(self):
+        self.last_active = time.time()
+
+    def cast_vote(self, voter_id: int, target_id: int) -> bool:
+        """Record a vote; False if the voter already voted this round"""
+        if voter_id in self.votes:
+            return False
+        self.votes[voter_id] = target_id
+        self.counts[target_id] += 1
+        return True
+
+    def all_voted(self) -> bool:
+        return len(self.votes) == len(self.players)
+
+    def new_round(self):
+        self.round += 1
+        self.votes.clear()
+        self.counts.clear()
 
-class JoinView(discord.ui.View):
-    """Lobby view: Join / Leave / Start buttons."""
-    def __init__(self, cog: "Undercover"):
-        super().__init__(timeout=None)
-        self.cog = cog
-
-    @discord.ui.button(label="Join", style=discord.ButtonStyle.success, emoji="➕")
-    async def join(self, interaction: discord.Interaction, _button: discord.ui.Button):
-        await self.cog.add_player(interaction)
-
-    @discord.ui.button(label="Leave", style=discord.ButtonStyle.secondary, emoji="➖")
-    async def leave(self, interaction: discord.Interaction, _button: discord.ui.Button):
-        await self.cog.remove_player(interaction)
-
-    @discord.ui.button(label="Start Game", style=discord.ButtonStyle.primary, emoji="🎲")
-    async def start(self, interaction: discord.Interaction, _button: discord.ui.Button):
-        await self.cog.try_start_game(interaction)
 
 class VoteView(discord.ui.View):
-    """One button per remaining player. Disables after voting."""
-    def __init__(self, cog: "Undercover", voter: discord.Member):
+    """One button per remaining player, shared by every voter's DM for a round."""
+    def __init__(self, cog: "Undercover", game: UndercoverGame):
         super().__init__(timeout=120)
         self.cog = cog
-        self.voter = voter
+        self.game = game
+        self.round = game.round
+        # voter id -> their DM panel, until they vote
+        self.pending: dict[int, discord.Message] = {}
 
-        for player in cog.game["players"]:
-            self.add_item(VoteButton(player))
+        for player_id, player in game.players.items():
+            self.add_item(VoteButton(player_id, player.display_name))
 
     async def on_timeout(self) -> None:
         for item in self.children:
             item.disabled = True
-        if self.message:
-            await self.message.edit(view=self)
+        for message in self.pending.values():
+            try:
+                await message.edit(view=self)
+            except discord.HTTPException:
+                pass
 
 class VoteButton(discord.ui.Button):
-    def __init__(self, target: discord.Member):
+    def __init__(self, target_id: int, target_name: str):
         super().__init__(
-            label=target.display_name,
+            label=target_name,
             style=discord.ButtonStyle.secondary
         )
-        self.target = target
+        self.target_id = target_id
+        self.target_name = target_name
 
     async def callback(self, interaction: discord.Interaction):
         view: VoteView = self.view
         cog = view.cog
-        voter = view.voter
+        game = view.game
+        voter_id = interaction.user.id
+
+        if cog.sessions.get(game.channel_id) is not game or game.round != view.round:
+            await interaction.response.edit_message(content="This vote is over.", view=None)
+            return
 
-        if voter in cog.game["votes"]:
+        if voter_id not in game.players or not game.cast_vote(voter_id, self.target_id):
             await interaction.response.send_message(
                 "You have already voted this round!",
                 ephemeral=True
             )
             return
 
-        cog.game["votes"][voter] = self.target
-        await interaction.response.send_message(
-            f"Your vote for **{self.target.display_name}** has been recorded ✅",
-            ephemeral=True
+        # One call both confirms the vote and removes this voter's buttons
+        view.pending.pop(voter_id, None)
+        game.touch()
+        cog.schedule_timeout(game)
+        await interaction.response.edit_message(
+            content=f"Your vote for **{self.target_name}** has been recorded ✅",
+            view=None
         )
 
-        for item in view.children:
-            if isinstance(item, discord.ui.Button):
-                item.disabled = True
-        await view.message.edit(view=view)
-
-        if len(cog.game["votes"]) == len(cog.game["players"]):
-            await cog.tally_votes(view.message.channel)
+        if game.all_voted():
+            view.stop()
+            channel = cog.bot.get_channel(game.channel_id)
+            if channel is not None:
+                await cog.tally_votes(game, channel)
 
 class Undercover(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.game: dict[str, object] = {
-            "players": set(),
-            "started": False,
-            "undercover": None,
-            "votes": {},
-        }
+        # One game per channel, so any number can run across guilds at once
+        self.sessions: dict[int, UndercoverGame] = {}
+        self.expiry = Scheduler(self.expire_sessions)
+
+    async def cog_load(self):
+        ComponentRouter.register(self.bot, "undercover", self.lobby_action)
+        self.expiry.start()
+
+    async def cog_unload(self):
+        ComponentRouter.unregister("undercover", self.lobby_action)
+        await self.expiry.stop()
+        self.sessions.clear()
+
+    def session(self, channel_id: int) -> UndercoverGame:
+        game = self.sessions.get(channel_id)
+        if game is None:
+            game = self.sessions[channel_id] = UndercoverGame(channel_id)
+        game.touch()
+        self.schedule_timeout(game)
+        return game
+
+    def schedule_timeout(self, game: UndercoverGame):
+        self.expiry.schedule(game.channel_id, game.last_active + SESSION_TIMEOUT)
+
+    def end_session(self, game: UndercoverGame):
+        if self.sessions.get(game.channel_id) is game:
+            del self.sessions[game.channel_id]
+        self.expiry.cancel(game.channel_id)
+
+    async def expire_sessions(self, channel_ids: list[int]):
+        for channel_id in channel_ids:
+            game = self.sessions.get(channel_id)
+            if game is not None and time.time() - game.last_active >= SESSION_TIMEOUT:
+                log.info("Dropping idle Undercover game in channel %s", channel_id)
+                del self.sessions[channel_id]
 
     @app_commands.command(
         name="undercover",
@@ -89,130 +167,153 @@ class Undercover(commands.Cog):
     )
     async def undercover_entry(self, interaction: discord.Interaction):
         """Show the Undercover game lobby."""
-        embed = self.lobby_embed()
-        view = JoinView(self)
+        game = self.session(interaction.channel_id)
+        if game.started:
+            await interaction.response.send_message(
+                "A game is already running in this channel.",
+                ephemeral=True
+            )
+            return
+
+        embed = self.lobby_embed(game)
+        view = JoinView(interaction.channel_id)
 
         await interaction.response.send_message(
             embed=embed,
             view=view
         )
 
+    async def lobby_action(self, interaction: discord.Interaction, _channel_id: int, action: str):
+        """Route handler for the lobby buttons; games are keyed by the clicking channel"""
+        if action == "join":
+            await self.add_player(interaction)
+        elif action == "leave":
+            await self.remove_player(interaction)
+        elif action == "start":
+            await self.try_start_game(interaction)
+
     async def add_player(self, interaction: discord.Interaction):
-        if self.game["started"]:
+        game = self.session(interaction.channel_id)
+        if game.started:
             await interaction.response.send_message(
                 "The game has already started.",
                 ephemeral=True
             )
             return
 
-        self.game["players"].add(interaction.user)
+        game.players[interaction.user.id] = interaction.user
         await interaction.response.edit_message(
-            embed=self.lobby_embed()
+            embed=self.lobby_embed(game)
         )
 
     async def remove_player(self, interaction: discord.Interaction):
-        if self.game["started"]:
+        game = self.session(interaction.channel_id)
+        if game.started:
             await interaction.response.send_message(
                 "The game has already started.",
                 ephemeral=True
             )
             return
 
-        self.game["players"].discard(interaction.user)
+        game.players.pop(interaction.user.id, None)
         await interaction.response.edit_message(
-            embed=self.lobby_embed()
+            embed=self.lobby_embed(game)
         )
 
     async def try_start_game(self, interaction: discord.Interaction):
-        if self.game["started"]:
+        game = self.session(interaction.channel_id)
+        if game.started:
             await interaction.response.send_message(
                 "The game is already running.",
                 ephemeral=True
             )
             return
 
-        if len(self.game["players"]) < 3:
+        if len(game.players) < 3:
             await interaction.response.send_message(
                 "At least 3 players are required to start.",
                 ephemeral=True
             )
             return
 
-        self.game["started"] = True
-        self.game["votes"].clear()
+        game.started = True
+        game.new_round()
 
-        players = list(self.game["players"])
-        self.game["undercover"] = random.choice(players)
+        game.undercover = random.choice(list(game.players))
         normal_word, undercover_word = random.choice(WORD_PAIRS)
 
-        for player in players:
-            try:
-                if player == self.game["undercover"]:
-                    await player.send(
-                        f"🕵️ You are **UNDERCOVER**!\nYour word: **{undercover_word}**"
-                    )
-                else:
-                    await player.send(
-                        f"✅ You are a normal player.\nYour word: **{normal_word}**"
-                    )
-            except discord.Forbidden:
-                await interaction.channel.send(
-                    f"⚠️ Cannot send DM to {player.display_name}."
-                )
-
+        # Answer the interaction before any DM so slow sends can't time it out
         await interaction.response.edit_message(
-            embed=self.round_embed(),
+            embed=self.round_embed(game),
             view=None
         )
 
-        await self.send_vote_panels(interaction.channel)
-
-    async def send_vote_panels(self, channel: discord.abc.Messageable):
-        """Send one private voting panel per player."""
-        for player in self.game["players"]:
-            try:
-                view = VoteView(self, voter=player)
-                msg = await player.send(
-                    "Who do you think is the undercover? Choose one:",
-                    view=view
+        async def send_word(player_id: int):
+            if player_id == game.undercover:
+                await game.players[player_id].send(
+                    f"🕵️ You are **UNDERCOVER**!\nYour word: **{undercover_word}**"
                 )
-                view.message = msg
-            except discord.Forbidden:
-                await channel.send(
-                    f"⚠️ {player.display_name} has DMs disabled and cannot vote."
+            else:
+                await game.players[player_id].send(
+                    f"✅ You are a normal player.\nYour word: **{normal_word}**"
                 )
 
-    async def tally_votes(self, public_channel: discord.abc.Messageable):
-        counts: dict[discord.Member, int] = {}
-        for vote in self.game["votes"].values():
-            counts[vote] = counts.get(vote, 0) + 1
+        result = await fan_out(list(game.players), send_word)
+        if result.failed:
+            await interaction.channel.send("\n".join(
+                f"⚠️ Cannot send DM to {game.players[player_id].display_name}."
+                for player_id in result.failed
+            ))
+
+        await self.send_vote_panels(game, interaction.channel)
 
-        highest = max(counts.values())
-        tied_players = [p for p, n in counts.items() if n == highest]
-        eliminated = random.choice(tied_players)
+    async def send_vote_panels(self, game: UndercoverGame, channel: discord.abc.Messageable):
+        """Send every player a private voting panel backed by one view for the round."""
+        view = VoteView(self, game)
+
+        async def send_panel(player_id: int) -> discord.Message:
+            return await game.players[player_id].send(
+                "Who do you think is the undercover? Choose one:",
+                view=view
+            )
+
+        result = await fan_out(list(game.players), send_panel)
+        view.pending.update(result.sent)
+        if result.failed:
+            await channel.send("\n".join(
+                f"⚠️ {game.players[player_id].display_name} has DMs disabled and cannot vote."
+                for player_id in result.failed
+            ))
+
+    async def tally_votes(self, game: UndercoverGame, public_channel: discord.abc.Messageable):
+        # Counts were kept per vote; only the leaders need finding here
+        highest = max(game.counts.values())
+        tied_players = [p for p, n in game.counts.items() if n == highest]
+        eliminated_id = random.choice(tied_players)
+        eliminated = game.players[eliminated_id]
 
         messages = [f"🔎 **{eliminated.display_name}** has been eliminated!"]
 
-        if eliminated == self.game["undercover"]:
+        if eliminated_id == game.undercover:
             messages.append("🎉 The undercover has been caught! Civilians win!")
             await public_channel.send("\n".join(messages))
-            return self.reset()
+            return self.end_session(game)
 
         messages.append("❌ They were not the undercover. The game continues.")
-        self.game["players"].remove(eliminated)
+        del game.players[eliminated_id]
 
-        if len(self.game["players"]) < 3:
+        if len(game.players) < 3:
             messages.append("🤫 Fewer than 3 players left. Undercover wins!")
             await public_channel.send("\n".join(messages))
-            return self.reset()
+            return self.end_session(game)
 
-        self.game["votes"].clear()
+        game.new_round()
         await public_channel.send("\n".join(messages))
-        await public_channel.send(embed=self.round_embed())
-        await self.send_vote_panels(public_channel)
+        await public_channel.send(embed=self.round_embed(game))
+        await self.send_vote_panels(game, public_channel)
 
-    def lobby_embed(self) -> discord.Embed:
-        player_names = ", ".join(p.display_name for p in self.game["players"]) or "—"
+    def lobby_embed(self, game: UndercoverGame) -> discord.Embed:
+        player_names = ", ".join(p.display_name for p in game.players.values()) or "—"
         return (
             discord.Embed(
                 title="Undercover Lobby",
@@ -224,7 +325,7 @@ class Undercover(commands.Cog):
             )
         )
 
-    def round_embed(self) -> discord.Embed:
+    def round_embed(self, game: UndercoverGame) -> discord.Embed:
         return (
             discord.Embed(
                 title="🗳️ Voting Started!",
@@ -233,18 +334,10 @@ class Undercover(commands.Cog):
             )
             .add_field(
                 name="Active Players",
-                value=", ".join(p.display_name for p in self.game["players"]),
+                value=", ".join(p.display_name for p in game.players.values()),
                 inline=False
             )
         )
 
-    def reset(self):
-        self.game.update(
-            players=set(),
-            started=False,
-            undercover=None,
-            votes={}
-        )
-
 async def setup(bot: commands.Bot):
     await bot.add_cog(Undercover(bot))
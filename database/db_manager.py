@@ -1,19 +1,221 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+
 import aiosqlite
 from database.shop_data import ShopData
 from database.quest_data import QuestData
 
 DB_PATH = "rpg.db"
+READER_COUNT = 4
+
+# Applied once per pooled connection instead of once per query
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+async def commit_or_rollback(conn: aiosqlite.Connection) -> bool:
+    """Commit ``conn``, rolling back and re-raising if the commit fails
+
+    Cancelling the caller can't stop a commit aiosqlite has already handed
+    to its thread, so a cancellation here waits for the commit to land.
+    Returns True when that happened; the caller re-raises CancelledError
+    once it has dealt with the committed transaction.
+    """
+    commit = asyncio.ensure_future(conn.commit())
+    cancelled = False
+    while True:
+        try:
+            await asyncio.shield(commit)
+            return cancelled
+        except asyncio.CancelledError:
+            if not commit.done():
+                cancelled = True
+                continue
+            if conn.in_transaction:
+                await conn.rollback()
+            raise
+        except Exception:
+            if conn.in_transaction:
+                await conn.rollback()
+            raise
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived aiosqlite connections: one writer, N readers"""
+
+    def __init__(self, path: str, readers: int = READER_COUNT):
+        self.path = path
+        self.max_readers = readers
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._writer_owner: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._readers: list[aiosqlite.Connection] = []
+        self._opening = 0
+        self._closed = False
+
+    async def _connect(self, readonly: bool = False) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.path)
+        conn.row_factory = aiosqlite.Row
+        for pragma in PRAGMAS:
+            await conn.execute(pragma)
+        if readonly:
+            await conn.execute("PRAGMA query_only=1")
+        return conn
+
+    async def open(self):
+        """Open the writer connection; readers are opened on demand"""
+        if self._writer is None:
+            self._writer = await self._connect()
+
+    async def close(self):
+        """Close every pooled connection"""
+        self._closed = True
+        async with self._write_lock:
+            if self._writer is not None:
+                await self._writer.close()
+                self._writer = None
+        for conn in self._readers:
+            await conn.close()
+        self._readers.clear()
+
+    async def _acquire_reader(self) -> aiosqlite.Connection:
+        if self._idle.empty() and len(self._readers) + self._opening < self.max_readers:
+            self._opening += 1
+            try:
+                conn = await self._connect(readonly=True)
+            finally:
+                self._opening -= 1
+            self._readers.append(conn)
+            return conn
+        return await self._idle.get()
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Check out a read-only connection"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        conn = await self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if conn in self._readers:
+                self._idle.put_nowait(conn)
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Check out the writer; commits on success, rolls back on error"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        if self._writer_owner is asyncio.current_task():
+            raise RuntimeError("Writer is already checked out by this task")
+
+        async with self._write_lock:
+            await self.open()
+            conn = self._writer
+            self._writer_owner = asyncio.current_task()
+            try:
+                yield conn
+            except BaseException:
+                if conn.in_transaction:
+                    await conn.rollback()
+                raise
+            else:
+                if conn.in_transaction and await commit_or_rollback(conn):
+                    raise asyncio.CancelledError
+            finally:
+                self._writer_owner = None
+
+
+class UnitOfWork:
+    """A single BEGIN IMMEDIATE ... COMMIT shared by every call in one interaction
+
+    Services take it as an optional ``uow`` argument; when given, they run on
+    its connection and leave committing to the surrounding transaction.
+    """
+
+    def __init__(self, conn: aiosqlite.Connection):
+        self.conn = conn
+        self._after_commit: list[Callable[[], None]] = []
+        self._after_rollback: list[Callable[[], None]] = []
+
+    def after_commit(self, callback: Callable[[], None]):
+        """Run ``callback`` once the transaction has committed"""
+        self._after_commit.append(callback)
+
+    def after_rollback(self, callback: Callable[[], None]):
+        """Run ``callback`` if the transaction is rolled back"""
+        self._after_rollback.append(callback)
+
+    @asynccontextmanager
+    async def borrow(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Yield the transaction's connection without committing"""
+        yield self.conn
+
 
 class DatabaseManager:
     """Handles all database operations asynchronously"""
 
+    _pool: Optional[ConnectionPool] = None
+
+    @staticmethod
+    def pool() -> ConnectionPool:
+        """Return the shared pool, creating it on first use"""
+        if DatabaseManager._pool is None:
+            DatabaseManager._pool = ConnectionPool(DB_PATH)
+        return DatabaseManager._pool
+
+    @staticmethod
+    def reader(uow: Optional[UnitOfWork] = None):
+        """Check out a pooled read-only connection, or reuse the unit of work's"""
+        if uow is not None:
+            return uow.borrow()
+        return DatabaseManager.pool().reader()
+
+    @staticmethod
+    def writer(uow: Optional[UnitOfWork] = None):
+        """Check out the pooled writer connection, or reuse the unit of work's"""
+        if uow is not None:
+            return uow.borrow()
+        return DatabaseManager.pool().writer()
+
+    @staticmethod
+    @asynccontextmanager
+    async def transaction() -> AsyncIterator[UnitOfWork]:
+        """Open a unit of work that commits once when the block exits"""
+        async with DatabaseManager.pool().writer() as conn:
+            await conn.execute("BEGIN IMMEDIATE")
+            uow = UnitOfWork(conn)
+            try:
+                yield uow
+                cancelled = await commit_or_rollback(conn)
+            except BaseException:
+                if conn.in_transaction:
+                    await conn.rollback()
+                for callback in uow._after_rollback:
+                    callback()
+                raise
+
+        for callback in uow._after_commit:
+            callback()
+        if cancelled:
+            raise asyncio.CancelledError
+
+    @staticmethod
+    async def close():
+        """Close the shared pool"""
+        if DatabaseManager._pool is not None:
+            await DatabaseManager._pool.close()
+            DatabaseManager._pool = None
+
     @staticmethod
     async def init_db():
         """Initialize database schema asynchronously"""
-        async with aiosqlite.connect(DB_PATH) as conn:
-            conn.row_factory = aiosqlite.Row
-            await conn.execute("PRAGMA journal_mode=WAL")
-
+        async with DatabaseManager.writer() as conn:
             # Users table
             await conn.execute("""
             CREATE TABLE IF NOT EXISTS users (
@@ -33,10 +235,20 @@ class DatabaseManager:
                 adventure_count INTEGER DEFAULT 0,
                 pvp_wins INTEGER DEFAULT 0,
                 pvp_losses INTEGER DEFAULT 0,
-                boss_kills INTEGER DEFAULT 0
+                boss_kills INTEGER DEFAULT 0,
+                hp_updated_at REAL
             )
             """)
 
+            # HP regenerates lazily from hp_updated_at; add it to older databases
+            async with conn.execute("PRAGMA table_info(users)") as cursor:
+                columns = {row['name'] for row in await cursor.fetchall()}
+            if 'hp_updated_at' not in columns:
+                await conn.execute("ALTER TABLE users ADD COLUMN hp_updated_at REAL")
+                await conn.execute(
+                    "UPDATE users SET hp_updated_at = ? WHERE hp < max_hp", (time.time(),)
+                )
+
             # Inventory table
             await conn.execute("""
             CREATE TABLE IF NOT EXISTS inventory (
@@ -109,13 +321,3 @@ class DatabaseManager:
                 row = await cursor.fetchone()
                 if row[0] == 0:
                     await ShopData.initialize_shop(conn)
-
-            await conn.commit()
-
-    @staticmethod
-    async def get_connection():
-        """Return a database connection"""
-        conn = await aiosqlite.connect(DB_PATH)
-        conn.row_factory = aiosqlite.Row
-        await conn.execute("PRAGMA journal_mode=WAL")
-        return conn
\ No newline at end of file
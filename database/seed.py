@@ -4,12 +4,13 @@ from database.quest_data import QuestData
 import asyncio
 
 async def reseed():
-    conn = await DatabaseManager.get_connection()
     try:
-        await ShopData.initialize_shop(conn)
-        await QuestData.initialize_quests(conn)
-        await conn.commit()
+        async with DatabaseManager.writer() as conn:
+            await ShopData.initialize_shop(conn)
+            await QuestData.initialize_quests(conn)
+        # A running bot loads the shop and quest catalogs once at startup and
+        # won't see these rows until it restarts: run /reload after seeding
     finally:
-        await conn.close()
+        await DatabaseManager.close()
 
 asyncio.run(reseed())
@@ -0,0 +1,50 @@
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# quest_type -> users column whose value is compared against the target
+QUEST_METRICS = {
+    'adventure': 'adventure_count',
+    'pvp': 'pvp_wins',
+    'boss': 'boss_kills',
+    'coins': 'balance',
+    'level': 'level'
+}
+
+# Wording a description must have for its number to be that metric's target,
+# so "Reach PvP rank 10" or "Defeat 10 sea bosses" are not read as plain counts.
+# Numbers may use thousands separators ("1,000,000")
+TARGET_PATTERNS = {
+    'adventure_count': re.compile(r'Complete (?P<target>\d[\d,]*) adventures', re.IGNORECASE),
+    'pvp_wins': re.compile(r'Win (?P<target>\d[\d,]*) (?:PvP battles|duels)', re.IGNORECASE),
+    'boss_kills': re.compile(r'Defeat (?P<target>\d[\d,]*) bosses', re.IGNORECASE),
+    'balance': re.compile(r'Collect (?P<target>\d[\d,]*) coins', re.IGNORECASE),
+    'level': re.compile(r'Reach level (?P<target>\d[\d,]*)', re.IGNORECASE)
+}
+
+@dataclass(frozen=True)
+class QuestDefinition:
+    """Quest data model with its completion requirement resolved up front"""
+    quest_id: int
+    name: str
+    description: str
+    reward_coins: int
+    reward_xp: int
+    requirement_level: int
+    quest_type: str
+    metric: Optional[str] = None
+    target: Optional[int] = None
+    
+    @property
+    def is_trackable(self) -> bool:
+        return self.metric is not None and self.target is not None
+    
+    def is_complete(self, value: int) -> bool:
+        return self.is_trackable and value >= self.target
+    
+    @staticmethod
+    def parse_target(metric: Optional[str], description: str) -> Optional[int]:
+        """Target for ``metric``; None when the description is worded for something else"""
+        pattern = TARGET_PATTERNS.get(metric)
+        match = pattern.fullmatch(description or '') if pattern else None
+        return int(match['target'].replace(',', '')) if match else None
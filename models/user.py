@@ -18,6 +18,7 @@ class User:
     pvp_wins: int = 0
     pvp_losses: int = 0
     boss_kills: int = 0
+    hp_updated_at: Optional[float] = None
     
     @property
     def win_rate(self) -> float:
@@ -1,45 +1,49 @@
-from typing import List, Dict, Any
-from database.db_manager import DatabaseManager
+from typing import Optional, List, Dict, Any
+from database.db_manager import DatabaseManager, UnitOfWork
+from services.shop_service import ShopService
+from services.user_service import UserService
 
 class InventoryService:
     """Handles inventory operations"""
     
     @staticmethod
-    async def get_inventory(user_id: int) -> List[Dict]:
+    async def get_inventory(user_id: int, uow: Optional[UnitOfWork] = None) -> List[Dict]:
         """Get user's inventory"""
-        conn = await DatabaseManager.get_connection()
-        try:
+        async with DatabaseManager.reader(uow) as conn:
             async with conn.execute("""
-                SELECT i.item, i.quantity, i.equipped, s.item_type, s.stat_bonus, s.bonus_value
-                FROM inventory i
-                LEFT JOIN shop s ON i.item = s.item
-                WHERE i.user_id = ?
-                ORDER BY i.equipped DESC, s.item_type
+                SELECT item, quantity, equipped FROM inventory WHERE user_id = ?
             """, (user_id,)) as cursor:
                 rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
-        finally:
-            await conn.close()
+        
+        inventory = []
+        for row in rows:
+            item = ShopService.get_item(row['item'])
+            inventory.append({
+                'item': row['item'],
+                'quantity': row['quantity'],
+                'equipped': row['equipped'],
+                'item_type': item.item_type if item else None,
+                'stat_bonus': item.stat_bonus if item else None,
+                'bonus_value': item.bonus_value if item else None
+            })
+        
+        inventory.sort(key=lambda i: (-i['equipped'], i['item_type'] or ''))
+        return inventory
     
     @staticmethod
-    async def add_item(user_id: int, item_name: str, quantity: int = 1):
+    async def add_item(user_id: int, item_name: str, quantity: int = 1, uow: Optional[UnitOfWork] = None):
         """Add item to inventory"""
-        conn = await DatabaseManager.get_connection()
-        try:
+        async with DatabaseManager.writer(uow) as conn:
             await conn.execute("""
                 INSERT INTO inventory (user_id, item, quantity)
                 VALUES (?, ?, ?)
                 ON CONFLICT(user_id, item) DO UPDATE SET quantity = quantity + ?
             """, (user_id, item_name, quantity, quantity))
-            await conn.commit()
-        finally:
-            await conn.close()
     
     @staticmethod
-    async def remove_item(user_id: int, item_name: str, quantity: int = 1) -> bool:
+    async def remove_item(user_id: int, item_name: str, quantity: int = 1, uow: Optional[UnitOfWork] = None) -> bool:
         """Remove item from inventory"""
-        conn = await DatabaseManager.get_connection()
-        try:
+        async with DatabaseManager.writer(uow) as conn:
             async with conn.execute("""
                 SELECT quantity FROM inventory WHERE user_id = ? AND item = ?
             """, (user_id, item_name)) as cursor:
@@ -57,81 +61,69 @@ class InventoryService:
                     WHERE user_id = ? AND item = ?
                 """, (quantity, user_id, item_name))
             
-            await conn.commit()
             return True
-        finally:
-            await conn.close()
     
     @staticmethod
-    async def equip_item(user_id: int, item_name: str) -> Dict[str, Any]:
+    async def equip_item(user_id: int, item_name: str, uow: Optional[UnitOfWork] = None) -> Dict[str, Any]:
         """Equip an item"""
-        conn = await DatabaseManager.get_connection()
-        try:
-            # Get item info
+        item = ShopService.get_item(item_name)
+        
+        async with DatabaseManager.writer(uow) as conn:
+            # Get inventory entry
             async with conn.execute("""
-                SELECT i.equipped, s.item_type, s.stat_bonus, s.bonus_value
-                FROM inventory i
-                JOIN shop s ON i.item = s.item
-                WHERE i.user_id = ? AND i.item = ?
+                SELECT equipped FROM inventory WHERE user_id = ? AND item = ?
             """, (user_id, item_name)) as cursor:
-                item = await cursor.fetchone()
+                owned = await cursor.fetchone()
             
-            if not item:
+            if not item or not owned:
                 return {'success': False, 'error': 'Item not found'}
             
-            if item['equipped']:
+            if owned['equipped']:
                 return {'success': False, 'error': 'Already equipped'}
             
             # Unequip old item of same type
             async with conn.execute("""
-                SELECT i.item, s.stat_bonus, s.bonus_value
-                FROM inventory i
-                JOIN shop s ON i.item = s.item
-                WHERE i.user_id = ? AND i.equipped = 1 AND s.item_type = ?
-            """, (user_id, item['item_type'])) as cursor:
-                old_item = await cursor.fetchone()
+                SELECT item FROM inventory WHERE user_id = ? AND equipped = 1
+            """, (user_id,)) as cursor:
+                equipped = [ShopService.get_item(row['item']) for row in await cursor.fetchall()]
+            
+            old_item = next((i for i in equipped if i and i.item_type == item.item_type), None)
             
             if old_item:
                 await conn.execute("UPDATE inventory SET equipped = 0 WHERE user_id = ? AND item = ?",
-                                 (user_id, old_item['item']))
+                                 (user_id, old_item.name))
                 
                 # Remove old stats
-                if old_item['stat_bonus'] == 'attack':
+                if old_item.stat_bonus == 'attack':
                     await conn.execute("UPDATE users SET attack = attack - ? WHERE user_id = ?",
-                                     (old_item['bonus_value'], user_id))
-                elif old_item['stat_bonus'] == 'defense':
+                                     (old_item.bonus_value, user_id))
+                elif old_item.stat_bonus == 'defense':
                     await conn.execute("UPDATE users SET defense = defense - ? WHERE user_id = ?",
-                                     (old_item['bonus_value'], user_id))
+                                     (old_item.bonus_value, user_id))
             
             # Equip new item
             await conn.execute("UPDATE inventory SET equipped = 1 WHERE user_id = ? AND item = ?",
                              (user_id, item_name))
             
             # Add new stats
-            if item['stat_bonus'] == 'attack':
+            if item.stat_bonus == 'attack':
                 await conn.execute("UPDATE users SET attack = attack + ? WHERE user_id = ?",
-                                 (item['bonus_value'], user_id))
-            elif item['stat_bonus'] == 'defense':
+                                 (item.bonus_value, user_id))
+            elif item.stat_bonus == 'defense':
                 await conn.execute("UPDATE users SET defense = defense + ? WHERE user_id = ?",
-                                 (item['bonus_value'], user_id))
-            
-            await conn.commit()
-            
-            return {
-                'success': True,
-                'stat_bonus': item['stat_bonus'],
-                'bonus_value': item['bonus_value']
-            }
-        finally:
-            await conn.close()
+                                 (item.bonus_value, user_id))
+        
+        UserService.invalidate(user_id, uow)
+        return {
+            'success': True,
+            'stat_bonus': item.stat_bonus,
+            'bonus_value': item.bonus_value
+        }
     
     @staticmethod
-    async def get_equipped_items(user_id: int) -> List[str]:
+    async def get_equipped_items(user_id: int, uow: Optional[UnitOfWork] = None) -> List[str]:
         """Get list of equipped item names"""
-        conn = await DatabaseManager.get_connection()
-        try:
+        async with DatabaseManager.reader(uow) as conn:
             async with conn.execute("SELECT item FROM inventory WHERE user_id = ? AND equipped = 1", (user_id,)) as cursor:
                 rows = await cursor.fetchall()
-                return [row['item'] for row in rows]
-        finally:
-            await conn.close()
\ No newline at end of file
+                return [row['item'] for row in rows]
\ No newline at end of file
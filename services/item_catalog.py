@@ -0,0 +1,58 @@
+from bisect import bisect_right
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from models.item import Item
+
+class ItemCatalog:
+    """Immutable in-memory copy of the shop table, indexed by name, type and level"""
+    
+    def __init__(self, items: Iterable[Item] = ()):
+        # Shop display order: cheapest items of the lowest level first
+        self.items: Tuple[Item, ...] = tuple(sorted(items, key=lambda i: (i.level_req, i.price)))
+        self.by_name: Mapping[str, Item] = MappingProxyType({i.name: i for i in self.items})
+        
+        by_type: Dict[str, List[Item]] = {}
+        for item in self.items:
+            by_type.setdefault(item.item_type, []).append(item)
+        self.by_type: Mapping[str, Tuple[Item, ...]] = MappingProxyType(
+            {item_type: tuple(group) for item_type, group in by_type.items()}
+        )
+        self._level_reqs = [i.level_req for i in self.items]
+    
+    def __len__(self) -> int:
+        return len(self.items)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self.by_name
+    
+    def get(self, name: str) -> Optional[Item]:
+        return self.by_name.get(name)
+    
+    def of_type(self, item_type: str) -> Tuple[Item, ...]:
+        return self.by_type.get(item_type, ())
+    
+    def available_at(self, level: int) -> Tuple[Item, ...]:
+        """Items whose level requirement is at most ``level``"""
+        return self.items[:bisect_right(self._level_reqs, level)]
+    
+    @staticmethod
+    async def load(conn) -> "ItemCatalog":
+        """Build a catalog from the shop table"""
+        async with conn.execute("""
+            SELECT item, description, price, item_type, stat_bonus, bonus_value, level_req
+            FROM shop
+        """) as cursor:
+            rows = await cursor.fetchall()
+        
+        return ItemCatalog(
+            Item(
+                name=row['item'],
+                description=row['description'],
+                price=row['price'],
+                item_type=row['item_type'],
+                stat_bonus=row['stat_bonus'],
+                bonus_value=row['bonus_value'],
+                level_req=row['level_req']
+            )
+            for row in rows
+        )
\ No newline at end of file
@@ -0,0 +1,114 @@
+import asyncio
+from bisect import bisect_left, insort
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from database.db_manager import DatabaseManager
+
+SQL_BATCH = 500
+
+# Sort key per category, best first; user_id breaks ties so ranks are stable
+CATEGORIES: Dict[str, Callable[[Dict[str, Any]], Tuple]] = {
+    'level': lambda r: (-r['level'], -r['xp'], r['user_id']),
+    'coins': lambda r: (-r['balance'], r['user_id']),
+    'pvp': lambda r: (-r['pvp_wins'], r['user_id']),
+    'bosses': lambda r: (-r['boss_kills'], r['user_id'])
+}
+
+COLUMNS = "user_id, username, level, xp, balance, pvp_wins, pvp_losses, boss_kills"
+
+class Leaderboard:
+    """Every user of one category in rank order, kept sorted as rows change"""
+    
+    def __init__(self, key: Callable[[Dict[str, Any]], Tuple]):
+        self.key = key
+        self._keys: List[Tuple] = []
+        self._rows: Dict[int, Dict[str, Any]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def load(self, rows: List[Dict[str, Any]]):
+        self._rows = {row['user_id']: row for row in rows}
+        self._keys = sorted(self.key(row) for row in rows)
+    
+    def upsert(self, row: Dict[str, Any]):
+        old = self._rows.get(row['user_id'])
+        if old is not None:
+            del self._keys[bisect_left(self._keys, self.key(old))]
+        self._rows[row['user_id']] = row
+        insort(self._keys, self.key(row))
+    
+    def page(self, offset: int, limit: int) -> List[Dict[str, Any]]:
+        """Rows ranked offset+1 .. offset+limit"""
+        return [self._rows[key[-1]] for key in self._keys[offset:offset + limit]]
+    
+    def rank(self, user_id: int) -> Optional[int]:
+        """1-based rank found by binary search on the user's key"""
+        row = self._rows.get(user_id)
+        if row is None:
+            return None
+        return bisect_left(self._keys, self.key(row)) + 1
+
+
+class LeaderboardService:
+    """Serves /leaderboard from memory, re-reading only users written since the last call"""
+    
+    boards: Dict[str, Leaderboard] = {name: Leaderboard(key) for name, key in CATEGORIES.items()}
+    _dirty: Set[int] = set()
+    _loaded = False
+    _lock = asyncio.Lock()
+    
+    @staticmethod
+    def mark_dirty(user_id: int):
+        """Queue a user whose leaderboard columns may have changed"""
+        LeaderboardService._dirty.add(user_id)
+    
+    @staticmethod
+    async def get_page(category: str, offset: int = 0, limit: int = 10) -> Tuple[List[Dict], int]:
+        """Rows for one page of a category and the number of ranked users"""
+        board = await LeaderboardService._board(category)
+        return board.page(offset, limit), len(board)
+    
+    @staticmethod
+    async def get_rank(category: str, user_id: int) -> Optional[int]:
+        """A user's 1-based rank in a category, or None if they have no profile"""
+        board = await LeaderboardService._board(category)
+        return board.rank(user_id)
+    
+    @staticmethod
+    async def _board(category: str) -> Leaderboard:
+        async with LeaderboardService._lock:
+            if not LeaderboardService._loaded:
+                await LeaderboardService._load()
+            elif LeaderboardService._dirty:
+                await LeaderboardService._refresh()
+        return LeaderboardService.boards[category]
+    
+    @staticmethod
+    async def _load():
+        # Clear first: anything written during the scan is re-read next call
+        LeaderboardService._dirty.clear()
+        async with DatabaseManager.reader() as conn:
+            async with conn.execute(f"SELECT {COLUMNS} FROM users") as cursor:
+                rows = [dict(row) for row in await cursor.fetchall()]
+        
+        for board in LeaderboardService.boards.values():
+            board.load(rows)
+        LeaderboardService._loaded = True
+    
+    @staticmethod
+    async def _refresh():
+        dirty = list(LeaderboardService._dirty)
+        LeaderboardService._dirty.clear()
+        
+        async with DatabaseManager.reader() as conn:
+            for i in range(0, len(dirty), SQL_BATCH):
+                chunk = dirty[i:i + SQL_BATCH]
+                placeholders = ", ".join("?" * len(chunk))
+                async with conn.execute(
+                    f"SELECT {COLUMNS} FROM users WHERE user_id IN ({placeholders})", chunk
+                ) as cursor:
+                    rows = [dict(row) for row in await cursor.fetchall()]
+                
+                for row in rows:
+                    for board in LeaderboardService.boards.values():
+                        board.upsert(row)
\ No newline at end of file
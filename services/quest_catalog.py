@@ -0,0 +1,52 @@
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from models.quest import QuestDefinition, QUEST_METRICS
+
+class QuestCatalog:
+    """Immutable index of quest definitions compiled from the quests table"""
+    
+    def __init__(self, quests: Iterable[QuestDefinition] = ()):
+        self.by_id: Mapping[int, QuestDefinition] = MappingProxyType({q.quest_id: q for q in quests})
+        
+        by_metric: Dict[str, List[QuestDefinition]] = {}
+        for quest in self.by_id.values():
+            if quest.is_trackable:
+                by_metric.setdefault(quest.metric, []).append(quest)
+        self.by_metric: Mapping[str, Tuple[QuestDefinition, ...]] = MappingProxyType(
+            {metric: tuple(sorted(group, key=lambda q: q.target)) for metric, group in by_metric.items()}
+        )
+    
+    def __len__(self) -> int:
+        return len(self.by_id)
+    
+    def get(self, quest_id: int) -> Optional[QuestDefinition]:
+        return self.by_id.get(quest_id)
+    
+    def for_metric(self, metric: str) -> Tuple[QuestDefinition, ...]:
+        """Trackable quests on ``metric``, ordered by target"""
+        return self.by_metric.get(metric, ())
+    
+    @staticmethod
+    async def load(conn) -> "QuestCatalog":
+        """Build a catalog from the quests table, parsing each target once"""
+        async with conn.execute("""
+            SELECT quest_id, name, description, reward_coins, reward_xp, requirement_level, quest_type
+            FROM quests
+        """) as cursor:
+            rows = await cursor.fetchall()
+        
+        quests = []
+        for row in rows:
+            metric = QUEST_METRICS.get(row['quest_type'])
+            quests.append(QuestDefinition(
+                quest_id=row['quest_id'],
+                name=row['name'],
+                description=row['description'],
+                reward_coins=row['reward_coins'],
+                reward_xp=row['reward_xp'],
+                requirement_level=row['requirement_level'],
+                quest_type=row['quest_type'],
+                metric=metric,
+                target=QuestDefinition.parse_target(metric, row['description'])
+            ))
+        return QuestCatalog(quests)
\ No newline at end of file
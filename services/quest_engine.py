@@ -0,0 +1,135 @@
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from database.db_manager import DatabaseManager, UnitOfWork
+from models.quest import QuestDefinition, QUEST_METRICS
+from services.quest_service import QuestService
+from services.user_service import UserService
+from utils.game_logic import GameLogic
+
+class QuestEngine:
+    """Advances quests from game events instead of rescanning every active quest
+    
+    Each user's active quests are kept in ``QuestService.active`` as
+    metric -> definitions sorted by descending target, so the next threshold
+    to reach is always the last element and an event costs one compare per
+    tracked metric until something completes.
+    """
+    
+    @staticmethod
+    async def publish(user_id: int, events: Iterable[str], uow: Optional[UnitOfWork] = None) -> List[Dict[str, Any]]:
+        """Apply game events for a user and return the quests they completed
+        
+        Run it after the triggering write, with the same unit of work, so
+        completions and rewards commit (or roll back) together with it.
+        Events are quest types: adventure, boss, pvp, coins, level. Each
+        completion carries ``new_level`` when its XP reward leveled the user up.
+        """
+        if uow is None:
+            async with DatabaseManager.transaction() as uow:
+                return await QuestEngine.publish(user_id, events, uow)
+        
+        async with DatabaseManager.writer(uow) as conn:
+            index = await QuestEngine._index(user_id, conn, uow)
+            pending = {QUEST_METRICS[event] for event in events if event in QUEST_METRICS} & index.keys()
+            if not pending:
+                return []
+            
+            # Rewards need the level, xp and balance even when no quest tracks them
+            columns = sorted(set(index) | {'level', 'xp', 'balance'})
+            async with conn.execute(
+                f"SELECT {', '.join(columns)} FROM users WHERE user_id = ?", (user_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                return []
+            
+            values = dict(row)
+            completed = []
+            
+            while pending:
+                metric = pending.pop()
+                quests = index.get(metric, [])
+                
+                while quests and quests[-1].target <= values[metric]:
+                    quest = quests.pop()
+                    level = values['level']
+                    if not await QuestEngine._complete(conn, user_id, quest, values):
+                        continue
+                    
+                    leveled_up = values['level'] > level
+                    completed.append({
+                        'name': quest.name,
+                        'reward_coins': quest.reward_coins,
+                        'reward_xp': quest.reward_xp,
+                        'new_level': values['level'] if leveled_up else None
+                    })
+                    
+                    # Rewards can push the balance or level past another quest
+                    if quest.reward_coins:
+                        pending.add('balance')
+                    if leveled_up:
+                        pending.add('level')
+                
+                if not quests:
+                    index.pop(metric, None)
+        
+        if completed:
+            UserService.invalidate(user_id, uow)
+        return completed
+    
+    @staticmethod
+    async def _index(user_id: int, conn, uow: UnitOfWork) -> Dict[str, List[QuestDefinition]]:
+        """Load (or reuse) the user's active quests grouped by metric"""
+        # The index is edited in place, so forget it if the transaction fails
+        uow.after_rollback(lambda: QuestService.active.pop(user_id))
+        
+        index = QuestService.active.get(user_id)
+        if index is not None:
+            return index
+        
+        async with conn.execute("""
+            SELECT quest_id FROM user_quests WHERE user_id = ? AND status = 'active'
+        """, (user_id,)) as cursor:
+            rows = await cursor.fetchall()
+        
+        index = {}
+        for row in rows:
+            quest = QuestService.catalog.get(row['quest_id'])
+            if quest is not None and quest.is_trackable:
+                index.setdefault(quest.metric, []).append(quest)
+        for quests in index.values():
+            quests.sort(key=lambda q: q.target, reverse=True)
+        
+        QuestService.active.set(user_id, index)
+        return index
+    
+    @staticmethod
+    async def _complete(conn, user_id: int, quest: QuestDefinition, values: Dict[str, int]) -> bool:
+        """Mark a quest completed and award it, updating ``values``; False if it was no longer active"""
+        cursor = await conn.execute("""
+            UPDATE user_quests SET status = 'completed', progress = ?
+            WHERE user_id = ? AND quest_id = ? AND status = 'active'
+        """, (values[quest.metric], user_id, quest.quest_id))
+        if cursor.rowcount == 0:
+            return False
+        
+        new_level, new_xp, leveled_up = GameLogic.apply_xp(values['level'], values['xp'], quest.reward_xp)
+        if leveled_up:
+            stats = GameLogic.get_level_stats(new_level)
+            await conn.execute("""
+                UPDATE users
+                SET balance = balance + ?, level = ?, xp = ?, class = ?,
+                    max_hp = ?, hp = ?, attack = ?, defense = ?, hp_updated_at = ?
+                WHERE user_id = ?
+            """, (quest.reward_coins, new_level, new_xp, stats['class'], stats['max_hp'],
+                  stats['max_hp'], stats['attack'], stats['defense'], time.time(), user_id))
+        else:
+            await conn.execute("""
+                UPDATE users
+                SET balance = balance + ?, xp = ?
+                WHERE user_id = ?
+            """, (quest.reward_coins, new_xp, user_id))
+        
+        values['balance'] += quest.reward_coins
+        values['level'], values['xp'] = new_level, new_xp
+        return True
\ No newline at end of file
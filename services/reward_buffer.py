@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from database.db_manager import DatabaseManager
+from services.quest_engine import QuestEngine
+from services.user_service import UserService
+from utils.game_logic import GameLogic
+
+log = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 10      # seconds between background flushes
+MAX_PENDING_USERS = 50   # flush early once this many users are waiting
+SQL_BATCH = 500          # stay well under SQLite's bound-parameter limit
+
+
+@dataclass
+class PendingReward:
+    """XP/coins earned by one user since the last flush"""
+    username: str
+    xp: int = 0
+    coins: int = 0
+    last_message_at: Optional[datetime] = None
+    context: Any = None
+
+
+class RewardBuffer:
+    """Accumulates message rewards in memory and writes them in one transaction"""
+    
+    def __init__(self, max_pending: int = MAX_PENDING_USERS):
+        self.max_pending = max_pending
+        self._pending: Dict[int, PendingReward] = {}
+        self._lock = asyncio.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._pending)
+    
+    def last_message_at(self, user_id: int) -> Optional[datetime]:
+        """Timestamp of the user's latest unflushed reward, if any"""
+        entry = self._pending.get(user_id)
+        return entry.last_message_at if entry else None
+    
+    def add(self, user_id: int, username: str, xp: int, coins: int,
+            at: datetime, context: Any = None) -> bool:
+        """Queue a reward. Returns True when the buffer should be flushed now"""
+        entry = self._pending.get(user_id)
+        if entry is None:
+            entry = self._pending[user_id] = PendingReward(username)
+        entry.username = username
+        entry.xp += xp
+        entry.coins += coins
+        entry.last_message_at = at
+        entry.context = context
+        return len(self._pending) >= self.max_pending
+    
+    async def flush(self) -> List[Dict[str, Any]]:
+        """Apply every pending reward and return the users who leveled up"""
+        async with self._lock:
+            if not self._pending:
+                return []
+            
+            batch, self._pending = self._pending, {}
+            try:
+                return await self._apply(batch)
+            except Exception:
+                log.exception("Failed to flush %d message rewards", len(batch))
+                self._requeue(batch)
+                return []
+            except BaseException:
+                # Cancelled: the batch is empty if its commit landed, so only
+                # rewards whose transaction rolled back are queued again
+                self._requeue(batch)
+                raise
+    
+    def _requeue(self, batch: Dict[int, PendingReward]):
+        """Put a failed batch back, merging with rewards queued meanwhile"""
+        for user_id, old in batch.items():
+            entry = self._pending.get(user_id)
+            if entry is None:
+                self._pending[user_id] = old
+            else:
+                entry.xp += old.xp
+                entry.coins += old.coins
+    
+    async def _apply(self, batch: Dict[int, PendingReward]) -> List[Dict[str, Any]]:
+        user_ids = list(batch)
+        rows = {}
+        
+        async with DatabaseManager.transaction() as uow:
+            conn = uow.conn
+            # Once committed the rewards are in the database; emptying the batch
+            # keeps a cancellation that arrives during the commit from requeueing them
+            uow.after_commit(batch.clear)
+            await conn.executemany(
+                "INSERT OR IGNORE INTO users (user_id, username) VALUES (?, ?)",
+                [(user_id, batch[user_id].username) for user_id in user_ids]
+            )
+            
+            for i in range(0, len(user_ids), SQL_BATCH):
+                chunk = user_ids[i:i + SQL_BATCH]
+                placeholders = ", ".join("?" * len(chunk))
+                async with conn.execute(
+                    f"SELECT user_id, level, xp, balance FROM users WHERE user_id IN ({placeholders})",
+                    chunk
+                ) as cursor:
+                    for row in await cursor.fetchall():
+                        rows[row['user_id']] = row
+            
+            plain, leveled, level_ups = [], [], {}
+            now = time.time()
+            for user_id, entry in batch.items():
+                row = rows[user_id]
+                new_level, new_xp, leveled_up = GameLogic.apply_xp(row['level'], row['xp'], entry.xp)
+                new_balance = max(0, row['balance'] + entry.coins)
+                last_ts = entry.last_message_at.isoformat()
+                
+                if leveled_up:
+                    stats = GameLogic.get_level_stats(new_level)
+                    leveled.append((new_level, new_xp, new_balance, stats['class'],
+                                    stats['max_hp'], stats['max_hp'], stats['attack'],
+                                    stats['defense'], now, last_ts, user_id))
+                    level_ups[user_id] = {
+                        'user_id': user_id,
+                        'new_level': new_level,
+                        'cls': stats['class'],
+                        'context': entry.context
+                    }
+                else:
+                    plain.append((new_xp, new_balance, last_ts, user_id))
+            
+            if plain:
+                await conn.executemany(
+                    "UPDATE users SET xp=?, balance=?, last_message_ts=? WHERE user_id=?",
+                    plain
+                )
+            if leveled:
+                await conn.executemany("""
+                    UPDATE users SET level=?, xp=?, balance=?, class=?,
+                                   max_hp=?, hp=?, attack=?, defense=?, hp_updated_at=?,
+                                   last_message_ts=?
+                    WHERE user_id=?
+                """, leveled)
+            
+            for user_id in user_ids:
+                UserService.invalidate(user_id, uow)
+            
+            # Quests see the new balance and level in the same transaction
+            for user_id, entry in batch.items():
+                events = (('coins',) if entry.coins else ()) + (('level',) if user_id in level_ups else ())
+                if not events:
+                    continue
+                completed = await QuestEngine.publish(user_id, events, uow)
+                new_level = max((q['new_level'] for q in completed if q['new_level']), default=None)
+                if new_level is not None:
+                    level_ups[user_id] = {
+                        'user_id': user_id,
+                        'new_level': new_level,
+                        'cls': GameLogic.get_class_for_level(new_level),
+                        'context': entry.context
+                    }
+        
+        return list(level_ups.values())
@@ -1,61 +1,54 @@
-from typing import Optional, Dict, Any
-from database.db_manager import DatabaseManager
+from typing import Optional, Dict, Any, Tuple
+from database.db_manager import DatabaseManager, UnitOfWork
+from models.item import Item
+from services.item_catalog import ItemCatalog
+from services.user_service import UserService
 
 class ShopService:
     """Handles shop operations"""
     
+    # Replaced wholesale by load_catalog; the shop table never changes at runtime
+    catalog = ItemCatalog()
+    
+    @staticmethod
+    async def load_catalog(uow: Optional[UnitOfWork] = None) -> ItemCatalog:
+        """(Re)load the item catalog from the shop table"""
+        async with DatabaseManager.reader(uow) as conn:
+            ShopService.catalog = await ItemCatalog.load(conn)
+        return ShopService.catalog
+    
     @staticmethod
-    async def get_all_items() -> list[Dict]:
+    def get_all_items() -> Tuple[Item, ...]:
         """Get all shop items"""
-        conn = await DatabaseManager.get_connection()
-        try:
-            async with conn.execute("""
-                SELECT item, description, price, item_type, bonus_value, stat_bonus, level_req
-                FROM shop ORDER BY level_req, price
-            """) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
-        finally:
-            await conn.close()
+        return ShopService.catalog.items
     
     @staticmethod
-    async def get_item(item_name: str) -> Optional[Dict]:
+    def get_item(item_name: str) -> Optional[Item]:
         """Get specific item"""
-        conn = await DatabaseManager.get_connection()
-        try:
-            async with conn.execute("""
-                SELECT item, description, price, item_type, stat_bonus, bonus_value, level_req
-                FROM shop WHERE item = ?
-            """, (item_name,)) as cursor:
-                row = await cursor.fetchone()
-                return dict(row) if row else None
-        finally:
-            await conn.close()
+        return ShopService.catalog.get(item_name)
     
     @staticmethod
-    async def purchase_item(user_id: int, item_name: str) -> Dict[str, Any]:
+    async def purchase_item(user_id: int, item_name: str, uow: Optional[UnitOfWork] = None) -> Dict[str, Any]:
         """Purchase an item"""
-        conn = await DatabaseManager.get_connection()
-        try:
-            # Get item
-            item = await ShopService.get_item(item_name)
-            if not item:
-                return {'success': False, 'error': 'Item not found'}
-            
+        item = ShopService.get_item(item_name)
+        if not item:
+            return {'success': False, 'error': 'Item not found'}
+        
+        async with DatabaseManager.writer(uow) as conn:
             # Get user
             async with conn.execute("SELECT balance, level FROM users WHERE user_id = ?", (user_id,)) as cursor:
                 user = await cursor.fetchone()
             
             # Validate
-            if user['level'] < item['level_req']:
-                return {'success': False, 'error': f"Need level {item['level_req']}"}
+            if user['level'] < item.level_req:
+                return {'success': False, 'error': f"Need level {item.level_req}"}
             
-            if user['balance'] < item['price']:
-                return {'success': False, 'error': f"Need {item['price']:,} coins"}
+            if user['balance'] < item.price:
+                return {'success': False, 'error': f"Need {item.price:,} coins"}
             
             # Purchase
             await conn.execute("UPDATE users SET balance = balance - ? WHERE user_id = ?",
-                             (item['price'], user_id))
+                             (item.price, user_id))
             
             # Add to inventory
             await conn.execute("""
@@ -63,8 +56,6 @@ class ShopService:
                 VALUES (?, ?, 1)
                 ON CONFLICT(user_id, item) DO UPDATE SET quantity = quantity + 1
             """, (user_id, item_name))
-            
-            await conn.commit()
-            return {'success': True, 'item': item}
-        finally:
-            await conn.close()
\ No newline at end of file
+        
+        UserService.invalidate(user_id, uow)
+        return {'success': True, 'item': item}
\ No newline at end of file
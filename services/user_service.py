@@ -1,32 +1,77 @@
+import time
+from dataclasses import replace
 from typing import Optional, Dict, List, Any
-from database.db_manager import DatabaseManager
+from database.db_manager import DatabaseManager, UnitOfWork
 from models.user import User
+from services.leaderboard_service import LeaderboardService
+from utils.lru_cache import TTLCache
 from utils.game_logic import GameLogic
 
+# users columns whose names differ from the User dataclass fields
+COLUMN_FIELDS = {'class': 'cls'}
+
 class UserService:
     """Handles user-related database operations"""
     
+    # User rows by user_id; set cache.enabled = False to bypass it in tests
+    cache = TTLCache(maxsize=5000, ttl=300)
+    
+    @staticmethod
+    def invalidate(user_id: int, uow: Optional[UnitOfWork] = None):
+        """Drop a cached user, once the unit of work commits if one is given"""
+        if uow is not None:
+            uow.after_commit(lambda: UserService.invalidate(user_id))
+        else:
+            UserService.cache.pop(user_id)
+            LeaderboardService.mark_dirty(user_id)
+    
     @staticmethod
-    async def ensure_user_exists(user_id: int, username: str):
+    def _write_through(user_id: int, uow: Optional[UnitOfWork], columns: Dict[str, Any]):
+        """Apply written columns to the cached user, or invalidate inside a transaction"""
+        if uow is not None:
+            UserService.invalidate(user_id, uow)
+            return
+        
+        LeaderboardService.mark_dirty(user_id)
+        user = UserService.cache.peek(user_id)
+        if user is None:
+            # Not cached, but a concurrent get_user may be about to store a stale row
+            UserService.cache.pop(user_id)
+            return
+        
+        for column, value in columns.items():
+            field = COLUMN_FIELDS.get(column, column)
+            if hasattr(user, field):
+                setattr(user, field, value)
+    
+    @staticmethod
+    async def ensure_user_exists(user_id: int, username: str, uow: Optional[UnitOfWork] = None):
         """Create user if doesn't exist"""
-        conn = await DatabaseManager.get_connection()
-        try:
-            await conn.execute(
+        async with DatabaseManager.writer(uow) as conn:
+            cursor = await conn.execute(
                 "INSERT OR IGNORE INTO users (user_id, username) VALUES (?, ?)",
                 (user_id, username)
             )
-            await conn.commit()
-        finally:
-            await conn.close()
+        
+        # New users show up on the leaderboards
+        if cursor.rowcount:
+            UserService.invalidate(user_id, uow)
     
     @staticmethod
-    async def get_user(user_id: int) -> Optional[User]:
+    async def get_user(user_id: int, uow: Optional[UnitOfWork] = None) -> Optional[User]:
         """Get user by ID"""
-        conn = await DatabaseManager.get_connection()
-        try:
+        # Inside a transaction the cache may lag uncommitted writes, so read through
+        if uow is None:
+            cached = UserService.cache.get(user_id)
+            if cached is not None:
+                return UserService._with_regen(cached)
+            generation = UserService.cache.generation
+        
+        async with DatabaseManager.reader(uow) as conn:
             async with conn.execute("""
                 SELECT user_id, username, balance, level, xp, class, hp, max_hp,
-                       attack, defense, adventure_count, pvp_wins, pvp_losses, boss_kills
+                       attack, defense, adventure_count, pvp_wins, pvp_losses, boss_kills,
+                       hp_updated_at
                 FROM users WHERE user_id = ?
             """, (user_id,)) as cursor:
                 row = await cursor.fetchone()
@@ -34,7 +79,7 @@ class UserService:
                 if not row:
                     return None
                 
-                return User(
+                user = User(
                     user_id=row['user_id'],
                     username=row['username'],
                     balance=row['balance'],
@@ -48,89 +93,81 @@ class UserService:
                     adventure_count=row['adventure_count'],
                     pvp_wins=row['pvp_wins'],
                     pvp_losses=row['pvp_losses'],
-                    boss_kills=row['boss_kills']
+                    boss_kills=row['boss_kills'],
+                    hp_updated_at=row['hp_updated_at']
                 )
-        finally:
-            await conn.close()
+        
+        if uow is None:
+            UserService.cache.set(user_id, user, generation)
+        return UserService._with_regen(user)
+    
+    @staticmethod
+    def _with_regen(user: User) -> User:
+        """Copy of a stored user with HP regenerated up to now"""
+        return replace(user, hp=GameLogic.effective_hp(user.hp, user.max_hp, user.hp_updated_at))
     
     @staticmethod
-    async def update_user_stats(user_id: int, **kwargs):
+    async def update_user_stats(user_id: int, uow: Optional[UnitOfWork] = None, **kwargs):
         """Update user stats"""
         if not kwargs:
             return
         
+        # Writing HP materializes regeneration; restart the clock from here
+        if 'hp' in kwargs:
+            kwargs.setdefault('hp_updated_at', time.time())
+        
         set_clause = ", ".join(f"{k}=?" for k in kwargs.keys())
         values = list(kwargs.values()) + [user_id]
         
-        conn = await DatabaseManager.get_connection()
-        try:
+        async with DatabaseManager.writer(uow) as conn:
             await conn.execute(f"UPDATE users SET {set_clause} WHERE user_id=?", values)
-            await conn.commit()
-        finally:
-            await conn.close()
+        
+        UserService._write_through(user_id, uow, kwargs)
     
     @staticmethod
-    async def add_xp_and_coins(user_id: int, xp: int, coins: int) -> Dict[str, Any]:
+    async def add_xp_and_coins(user_id: int, xp: int, coins: int, uow: Optional[UnitOfWork] = None) -> Dict[str, Any]:
         """Add XP and coins, handle level ups"""
-        conn = await DatabaseManager.get_connection()
-        try:
+        async with DatabaseManager.writer(uow) as conn:
             async with conn.execute("SELECT level, xp, balance FROM users WHERE user_id=?", (user_id,)) as cursor:
                 row = await cursor.fetchone()
             
-            new_xp = row['xp'] + xp
+            new_level, new_xp, leveled_up = GameLogic.apply_xp(row['level'], row['xp'], xp)
             new_balance = max(0, row['balance'] + coins)
-            new_level = row['level']
             
-            leveled_up = False
-            needed = GameLogic.calculate_level_xp(new_level)
-            
-            while new_xp >= needed:
-                new_xp -= needed
-                new_level += 1
-                leveled_up = True
-                needed = GameLogic.calculate_level_xp(new_level)
+            columns = {'level': new_level, 'xp': new_xp, 'balance': new_balance}
             
             if leveled_up:
                 stats = GameLogic.get_level_stats(new_level)
+                columns.update({
+                    'class': stats['class'],
+                    'max_hp': stats['max_hp'],
+                    'hp': stats['max_hp'],
+                    'attack': stats['attack'],
+                    'defense': stats['defense'],
+                    'hp_updated_at': time.time()
+                })
                 await conn.execute("""
                     UPDATE users SET level=?, xp=?, balance=?, class=?,
-                                   max_hp=?, hp=?, attack=?, defense=?
+                                   max_hp=?, hp=?, attack=?, defense=?, hp_updated_at=?
                     WHERE user_id=?
                 """, (new_level, new_xp, new_balance, stats['class'],
                       stats['max_hp'], stats['max_hp'], stats['attack'],
-                      stats['defense'], user_id))
+                      stats['defense'], columns['hp_updated_at'], user_id))
             else:
                 await conn.execute("""
                     UPDATE users SET xp=?, balance=? WHERE user_id=?
                 """, (new_xp, new_balance, user_id))
-            
-            await conn.commit()
-            
-            return {
-                'leveled_up': leveled_up,
-                'new_level': new_level,
-                'new_xp': new_xp,
-                'new_balance': new_balance
-            }
-        finally:
-            await conn.close()
+        
+        UserService._write_through(user_id, uow, columns)
+        return {
+            'leveled_up': leveled_up,
+            'new_level': new_level,
+            'new_xp': new_xp,
+            'new_balance': new_balance
+        }
     
     @staticmethod
-    async def get_leaderboard(category: str, limit: int = 10) -> List[Dict]:
+    async def get_leaderboard(category: str, limit: int = 10, offset: int = 0) -> List[Dict]:
         """Get leaderboard by category"""
-        conn = await DatabaseManager.get_connection()
-        try:
-            if category == "level":
-                query = "SELECT username, level, xp FROM users ORDER BY level DESC, xp DESC LIMIT ?"
-            elif category == "coins":
-                query = "SELECT username, balance FROM users ORDER BY balance DESC LIMIT ?"
-            elif category == "pvp":
-                query = "SELECT username, pvp_wins, pvp_losses FROM users ORDER BY pvp_wins DESC LIMIT ?"
-            else:  # bosses
-                query = "SELECT username, boss_kills FROM users ORDER BY boss_kills DESC LIMIT ?"
-            
-            async with conn.execute(query, (limit,)) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
-        finally:
-            await conn.close()
\ No newline at end of file
+        rows, _ = await LeaderboardService.get_page(category, offset, limit)
+        return rows
\ No newline at end of file
@@ -0,0 +1,87 @@
+import random
+from collections import Counter
+
+import pytest
+
+from utils.draw import DrawResult, draw, sample_without_replacement
+
+PRIZES = [("Nitro", 50), ("Role", 30), ("Coins", 20)]
+
+
+def test_seed_reproduces_draw_in_any_entrant_order():
+    entrants = list(range(1000))
+    first = draw(entrants, PRIZES, 10, seed=1234)
+    shuffled = entrants[:]
+    random.Random(5).shuffle(shuffled)
+
+    assert draw(shuffled, PRIZES, 10, seed=first.seed) == first
+    assert draw(entrants, PRIZES, 10, seed=4321) != first
+
+
+def test_generated_seed_is_recorded_and_fits_sqlite():
+    result = draw(range(100), PRIZES, 5)
+
+    assert 0 <= result.seed < 2**63
+    assert draw(range(100), PRIZES, 5, seed=result.seed) == result
+
+
+def test_winners_are_distinct_across_prizes():
+    result = draw(range(200), PRIZES, 150, seed=7)
+    winners = [entrant for entrant, _ in result.winners]
+
+    assert len(winners) == 150
+    assert len(set(winners)) == len(winners)
+    assert {prize for _, prize in result.winners} <= {name for name, _ in PRIZES}
+
+
+def test_fewer_entrants_than_winners_draws_everyone_once():
+    result = draw([3, 1, 2], PRIZES, 10, seed=1)
+
+    assert sorted(entrant for entrant, _ in result.winners) == [1, 2, 3]
+
+
+def test_no_entrants_means_no_winners():
+    assert draw([], PRIZES, 5, seed=1) == DrawResult(1, [])
+
+
+@pytest.mark.parametrize("prizes", [[], [("Nitro", 0), ("Role", 0)], [("Nitro", -5)]])
+def test_prizes_without_chance_award_nothing(prizes):
+    assert draw(range(10), prizes, 5, seed=1).winners == []
+
+
+def test_zero_chance_prize_is_never_awarded():
+    result = draw(range(1000), [("Nitro", 1), ("Nothing", 0), ("Role", 1)], 1000, seed=3)
+
+    assert "Nothing" not in {prize for _, prize in result.winners}
+
+
+def test_prize_split_follows_chances():
+    result = draw(range(20_000), PRIZES, 20_000, seed=11)
+    counts = Counter(prize for _, prize in result.winners)
+    total = sum(chance for _, chance in PRIZES)
+
+    for name, chance in PRIZES:
+        assert counts[name] / 20_000 == pytest.approx(chance / total, abs=0.02)
+
+
+def test_zero_weights_are_never_sampled():
+    rng = random.Random(1)
+    picked = sample_without_replacement(rng, list(range(100)), 100, weight=lambda x: x % 2)
+
+    assert len(picked) == 50
+    assert all(x % 2 for x in picked)
+
+
+def test_all_zero_weights_sample_nothing():
+    rng = random.Random(1)
+
+    assert sample_without_replacement(rng, list(range(10)), 5, weight=lambda x: 0) == []
+
+
+def test_heavier_weights_win_more_often():
+    rng = random.Random(2)
+    wins = Counter()
+    for _ in range(2000):
+        wins.update(sample_without_replacement(rng, ["light", "heavy"], 1, weight=lambda x: 3 if x == "heavy" else 1))
+
+    assert wins["heavy"] / 2000 == pytest.approx(0.75, abs=0.04)
@@ -0,0 +1,123 @@
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Union
+
+import discord
+from discord.ext import commands
+
+log = logging.getLogger(__name__)
+
+# Called as handler(interaction, entity_id, page)
+RouteHandler = Callable[[discord.Interaction, int, str], Awaitable[None]]
+
+
+class ComponentRouter:
+    """Routes button clicks by custom_id, so no view object outlives its message
+
+    Every routed custom_id reads ``<route>:<entity id>:<page>``. The route
+    names the kind of panel (``profile``, ``shop``...), the entity is whose
+    panel it is, and the page is what the button shows or does. Handlers
+    reload whatever they need from the service caches on each click, so
+    buttons keep working across restarts for as long as a cog has the route
+    registered.
+    """
+
+    handlers: Dict[str, RouteHandler] = {}
+
+    @staticmethod
+    def custom_id(route: str, entity_id: int, page: str) -> str:
+        return f"{route}:{entity_id}:{page}"
+
+    @staticmethod
+    def register(bot: commands.Bot, route: str, handler: RouteHandler):
+        """Send clicks on ``route`` buttons to ``handler``; call from cog_load"""
+        # Keyed by template, so adding it again for every route is a no-op
+        bot.add_dynamic_items(RoutedButton)
+        ComponentRouter.handlers[route] = handler
+
+    @staticmethod
+    def unregister(route: str, handler: RouteHandler):
+        """Drop ``route`` unless another cog instance has since taken it over"""
+        if ComponentRouter.handlers.get(route) == handler:
+            del ComponentRouter.handlers[route]
+
+    @staticmethod
+    async def dispatch(interaction: discord.Interaction, route: str, entity_id: int, page: str):
+        handler = ComponentRouter.handlers.get(route)
+        if handler is None:
+            await interaction.response.send_message("❌ This panel is no longer available.", ephemeral=True)
+            return
+
+        try:
+            await handler(interaction, entity_id, page)
+        except Exception:
+            log.exception("Component route %s failed for %s:%s", route, entity_id, page)
+            message = "❌ An error occurred while handling this button."
+            if interaction.response.is_done():
+                await interaction.followup.send(message, ephemeral=True)
+            else:
+                await interaction.response.send_message(message, ephemeral=True)
+
+
+class RoutedButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"(?P<route>[a-z_]+):(?P<entity_id>\d+):(?P<page>[^:]+)"
+):
+    """A button discord.py rebuilds from its custom_id whenever it is clicked"""
+
+    def __init__(
+        self,
+        route: str,
+        entity_id: int,
+        page: str,
+        *,
+        label: Optional[str] = None,
+        style: discord.ButtonStyle = discord.ButtonStyle.secondary,
+        emoji: Optional[Union[str, discord.PartialEmoji]] = None,
+        disabled: bool = False,
+        row: Optional[int] = None
+    ):
+        super().__init__(
+            discord.ui.Button(
+                label=label,
+                style=style,
+                emoji=emoji,
+                disabled=disabled,
+                row=row,
+                custom_id=ComponentRouter.custom_id(route, entity_id, page)
+            )
+        )
+        self.route = route
+        self.entity_id = entity_id
+        self.page = page
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(
+            match["route"],
+            int(match["entity_id"]),
+            match["page"],
+            label=item.label,
+            style=item.style,
+            emoji=item.emoji,
+            disabled=item.disabled
+        )
+
+    async def callback(self, interaction: discord.Interaction):
+        await ComponentRouter.dispatch(interaction, self.route, self.entity_id, self.page)
+
+
+class RoutedView(discord.ui.View):
+    """A view made only of RoutedButtons
+
+    It is stopped up front: a finished view is never put in the ViewStore,
+    and nothing needs it there since the buttons route by custom_id.
+    """
+
+    def __init__(self):
+        super().__init__(timeout=None)
+        self.stop()
+
+    def add_route(self, route: str, entity_id: int, page: str, **button) -> RoutedButton:
+        item = RoutedButton(route, entity_id, page, **button)
+        self.add_item(item)
+        return item
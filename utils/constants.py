@@ -8,6 +8,9 @@ GIPHY_API_KEY  = os.getenv("GIPHY_API_KEY")
 MC_SERVER_PATH = os.getenv("MC_SERVER_PATH")
 ROLE_ID       = int(os.getenv("ROLE_ID"))
 
+# Optional directory for rendered profile cards; memory-only when unset
+PROFILE_CARD_CACHE_DIR = os.getenv("PROFILE_CARD_CACHE_DIR")
+
 LUCK_STATUSES = [
     ("🍀", "Main Character Energy - Lock in"),
     ("⭐", "Plot Armor Activated - RNGesus loves you"),
@@ -25,6 +28,8 @@ INTENTS.message_content = True
 
 LOG_FORMAT = "[%(levelname)-5s] [%(asctime)s] %(name)s: %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Root log level; DEBUG turns on per-event tracing such as reaction roles
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
 ALLOWED_MATH = {name: obj for name, obj in math.__dict__.items()
                 if not name.startswith("__")}
@@ -0,0 +1,42 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Iterable, TypeVar
+
+import discord
+
+T = TypeVar("T", bound=Hashable)
+R = TypeVar("R")
+
+# DMs in flight at once; discord.py still queues them on its own rate limits
+DM_CONCURRENCY = 5
+
+
+@dataclass
+class FanOutResult(Generic[T, R]):
+    """What each recipient's send returned, and which sends failed"""
+    sent: Dict[T, R] = field(default_factory=dict)
+    failed: Dict[T, discord.HTTPException] = field(default_factory=dict)
+
+
+async def fan_out(
+    recipients: Iterable[T],
+    send: Callable[[T], Awaitable[R]],
+    limit: int = DM_CONCURRENCY
+) -> FanOutResult[T, R]:
+    """Run ``send(recipient)`` for every recipient, at most ``limit`` at a time
+
+    Discord errors (closed DMs, blocked bots, ...) are collected per
+    recipient instead of aborting the broadcast; anything else propagates.
+    """
+    result: FanOutResult[T, R] = FanOutResult()
+    slots = asyncio.Semaphore(limit)
+
+    async def one(recipient: T):
+        async with slots:
+            try:
+                result.sent[recipient] = await send(recipient)
+            except discord.HTTPException as e:
+                result.failed[recipient] = e
+
+    await asyncio.gather(*(one(recipient) for recipient in recipients))
+    return result
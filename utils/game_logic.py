@@ -1,5 +1,9 @@
 import random
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional, Tuple
+
+HP_REGEN_AMOUNT = 10     # HP restored per tick
+HP_REGEN_INTERVAL = 300  # seconds per tick, on a fixed wall-clock grid
 
 class GameLogic:
     """Game logic and calculations"""
@@ -9,6 +13,21 @@ class GameLogic:
         """Calculate XP needed for next level"""
         return int(100 * (1.5 ** (level - 1)))
     
+    @staticmethod
+    def apply_xp(level: int, xp: int, gained: int) -> Tuple[int, int, bool]:
+        """Add XP and roll over levels. Returns (level, xp, leveled_up)"""
+        xp += gained
+        leveled_up = False
+        needed = GameLogic.calculate_level_xp(level)
+        
+        while xp >= needed:
+            xp -= needed
+            level += 1
+            leveled_up = True
+            needed = GameLogic.calculate_level_xp(level)
+        
+        return level, xp, leveled_up
+    
     @staticmethod
     def get_class_for_level(level: int) -> str:
         """Get class name for level"""
@@ -31,6 +50,20 @@ class GameLogic:
             'defense': 5 + (level - 1)
         }
     
+    @staticmethod
+    def effective_hp(hp: int, max_hp: int, updated_at: Optional[float], now: Optional[float] = None) -> int:
+        """HP including regeneration since it was last written
+        
+        Ticks fall on multiples of HP_REGEN_INTERVAL, so writing HP in the
+        middle of a tick does not lose progress towards the next one.
+        """
+        if updated_at is None or hp >= max_hp:
+            return hp
+        
+        now = time.time() if now is None else now
+        ticks = int(now // HP_REGEN_INTERVAL) - int(updated_at // HP_REGEN_INTERVAL)
+        return min(max_hp, hp + HP_REGEN_AMOUNT * max(0, ticks))
+    
     @staticmethod
     def calculate_battle_power(attack: int, level: int) -> int:
         """Calculate battle power"""
@@ -0,0 +1,38 @@
+from typing import Optional
+
+import aiohttp
+
+# Shared by every outbound request: keep-alive connections and cached DNS
+CONNECTION_LIMIT = 50
+REQUEST_TIMEOUT = 10
+
+
+class HttpClient:
+    """One bot-wide aiohttp session, opened on first use and closed on shutdown"""
+
+    _session: Optional[aiohttp.ClientSession] = None
+
+    @staticmethod
+    def session() -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use"""
+        if HttpClient._session is None or HttpClient._session.closed:
+            HttpClient._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=CONNECTION_LIMIT, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            )
+        return HttpClient._session
+
+    @staticmethod
+    async def fetch_bytes(url: str) -> Optional[bytes]:
+        """GET ``url`` and return the body, or None on a non-200 response"""
+        async with HttpClient.session().get(url) as resp:
+            if resp.status != 200:
+                return None
+            return await resp.read()
+
+    @staticmethod
+    async def close():
+        """Close the shared session"""
+        if HttpClient._session is not None:
+            await HttpClient._session.close()
+            HttpClient._session = None
@@ -0,0 +1,32 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+
+def configure_logging(
+    level: int | str = logging.INFO,
+    fmt: Optional[str] = None,
+    datefmt: Optional[str] = None,
+    handler: Optional[logging.Handler] = None,
+) -> QueueListener:
+    """Route every log record through a queue to a handler on a background thread
+
+    The event loop only formats and enqueues records; the blocking write to
+    stderr (or ``handler``) happens on the listener's thread. Call ``stop()``
+    on the returned listener at shutdown to flush what is still queued.
+    """
+    if handler is None:
+        handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(fmt, datefmt))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(QueueHandler(records))
+    root.setLevel(level)
+
+    listener = QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    return listener
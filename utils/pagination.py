@@ -1,39 +1,29 @@
-import discord
 from discord import Embed, Color, Interaction
-from discord.ui import View, Button
 
-class ShopPaginator(View):
-    def __init__(self, pages):
-        super().__init__(timeout=120)
-        self.pages = pages
-        self.index = 0
-        self.message = None
+from utils.component_router import RoutedView
 
-        # Disable buttons if only 1 page
-        self.prev.disabled = len(pages) <= 1
-        self.next.disabled = len(pages) <= 1
+class ShopPaginator(RoutedView):
+    """Prev/next buttons routed as ``shop:<shown page>:prev|next``
 
-    @discord.ui.button(label="◀️", style=discord.ButtonStyle.secondary)
-    async def prev(self, interaction: Interaction, button: Button):
-        self.index = (self.index - 1) % len(self.pages)
-        await interaction.response.edit_message(embed=self.pages[self.index])
+    The shop has no owner, so the entity slot carries the page on screen;
+    the "shop" route rebuilds the pages from the catalog on each click.
+    """
 
-    @discord.ui.button(label="▶️", style=discord.ButtonStyle.secondary)
-    async def next(self, interaction: Interaction, button: Button):
-        self.index = (self.index + 1) % len(self.pages)
-        await interaction.response.edit_message(embed=self.pages[self.index])
+    def __init__(self, index: int, page_count: int):
+        super().__init__()
+        self.add_route("shop", index, "prev", label="◀️", disabled=page_count <= 1)
+        self.add_route("shop", index, "next", label="▶️", disabled=page_count <= 1)
 
 
-async def paginate_shop(interaction: Interaction, items):
-    """Send paginated shop embed"""
-    # Group items into embeds
+def shop_pages(items):
+    """Group items into embeds"""
     weapons, armor, consumables = [], [], []
     for item_data in items:
-        bonus = f"+{item_data['bonus_value']} {item_data['stat_bonus']}" if item_data['item_type'] != 'consumable' else ""
-        txt = f"**{item_data['item']}** - {item_data['price']:,} coins (Lv{item_data['level_req']})\n*{item_data['description']}* {bonus}\n"
-        if item_data['item_type'] == 'weapon':
+        bonus = f"+{item_data.bonus_value} {item_data.stat_bonus}" if not item_data.is_consumable() else ""
+        txt = f"**{item_data.name}** - {item_data.price:,} coins (Lv{item_data.level_req})\n*{item_data.description}* {bonus}\n"
+        if item_data.item_type == 'weapon':
             weapons.append(txt)
-        elif item_data['item_type'] == 'armor':
+        elif item_data.item_type == 'armor':
             armor.append(txt)
         else:
             consumables.append(txt)
@@ -53,6 +43,22 @@ async def paginate_shop(interaction: Interaction, items):
     for c_chunk in chunk(consumables):
         embed = Embed(title="🛒 Shop - Consumables", description="".join(c_chunk), color=Color.blue())
         pages.append(embed)
+    return pages
+
+
+async def paginate_shop(interaction: Interaction, items):
+    """Send paginated shop embed"""
+    pages = shop_pages(items)
+    await interaction.response.send_message(embed=pages[0], view=ShopPaginator(0, len(pages)))
+
+
+async def turn_shop_page(interaction: Interaction, items, index: int, direction: str):
+    """Show the page before or after ``index``, for the "shop" route"""
+    pages = shop_pages(items)
+    if not pages:
+        await interaction.response.edit_message(content="🛒 Shop empty.", embed=None, view=None)
+        return
 
-    paginator = ShopPaginator(pages)
-    await interaction.response.send_message(embed=pages[0], view=paginator)
+    step = -1 if direction == "prev" else 1
+    index = (index + step) % len(pages)
+    await interaction.response.edit_message(embed=pages[index], view=ShopPaginator(index, len(pages)))
@@ -1,9 +1,184 @@
 import discord
 from utils.game_logic import GameLogic
+from utils.render_cache import RenderCache
+from utils.lru_cache import TTLCache
+from utils.http import HttpClient
+from utils.constants import PROFILE_CARD_CACHE_DIR
+from utils.render_pool import RenderPool
+from models.user import User
 import io
-from PIL import Image, ImageDraw, ImageFont
-import aiohttp
+from dataclasses import asdict
+from functools import lru_cache
+from io import BytesIO
+from typing import Any, Dict, Optional, Tuple
+from PIL import Image, ImageChops, ImageDraw, ImageFont
 from pilmoji import Pilmoji
+from pilmoji.source import Twemoji
+
+CARD_SIZE = (800, 400)
+# zlib level for the PNG; cards are cached, so encode speed beats a few KB
+PNG_COMPRESS_LEVEL = 1
+
+class CachedTwemoji(Twemoji):
+    """Twemoji source that keeps downloaded emoji for the life of the process"""
+    
+    _emoji: Dict[str, Optional[bytes]] = {}
+    
+    def get_emoji(self, emoji: str, /) -> Optional[BytesIO]:
+        if emoji not in CachedTwemoji._emoji:
+            stream = super().get_emoji(emoji)
+            CachedTwemoji._emoji[emoji] = stream.getvalue() if stream else None
+        data = CachedTwemoji._emoji[emoji]
+        return BytesIO(data) if data is not None else None
+
+
+# Emoji source for Pilmoji; a class so each render opens its own HTTP session
+EMOJI_SOURCE = CachedTwemoji
+
+# Decoded layers kept by each render process, bounded like the parent's byte caches.
+# Static card layers: (class, background, border) -> base image
+_templates = TTLCache(maxsize=64, ttl=6 * 3600)
+# Rank backgrounds resized and dimmed, keyed by URL
+_backgrounds = TTLCache(maxsize=16, ttl=6 * 3600)
+# Avatars resized and masked, keyed by avatar hash
+_avatars = TTLCache(maxsize=128, ttl=3600)
+
+
+@lru_cache(maxsize=None)
+def card_fonts() -> Tuple[ImageFont.ImageFont, ImageFont.ImageFont, ImageFont.ImageFont, ImageFont.ImageFont]:
+    """Title, header, text and small fonts, loaded once"""
+    try:
+        title_font = ImageFont.truetype("arial.ttf", 36)
+        header_font = ImageFont.truetype("arial.ttf", 24)
+        text_font = ImageFont.truetype("arial.ttf", 18)
+        small_font = ImageFont.truetype("arial.ttf", 14)
+    except:
+        title_font = ImageFont.load_default()
+        header_font = ImageFont.load_default()
+        text_font = ImageFont.load_default()
+        small_font = ImageFont.load_default()
+    return title_font, header_font, text_font, small_font
+
+
+@lru_cache(maxsize=None)
+def border_mask(border_size: int = 130) -> Image.Image:
+    """Circular mask for the class-colored ring behind the avatar"""
+    mask = Image.new('L', (border_size, border_size), 0)
+    mask_draw = ImageDraw.Draw(mask)
+    mask_draw.ellipse((0, 0, border_size, border_size), fill=255)
+    return mask
+
+
+@lru_cache(maxsize=None)
+def gradient_layer() -> Image.Image:
+    """Fallback background used when no rank background could be loaded"""
+    width, height = CARD_SIZE
+    img = Image.new('RGBA', (width, height), color=(30, 30, 40))
+    draw = ImageDraw.Draw(img)
+    for i in range(height):
+        alpha = i / height
+        color = tuple(int(30 + (50 - 30) * alpha) for _ in range(3))
+        draw.rectangle([(0, i), (width, i+1)], fill=color)
+    return img
+
+
+def background_layer(background_key: str, background_data: Optional[bytes]) -> Optional[Image.Image]:
+    """Rank background resized to the card with the readability overlay applied
+    
+    None when this process has not seen ``background_key`` yet and no data
+    was sent, or when the data is not an image.
+    """
+    background = _backgrounds.get(background_key)
+    if background is not None or background_data is None:
+        return background
+    
+    try:
+        background = Image.open(io.BytesIO(background_data)).convert('RGBA').resize(CARD_SIZE)
+    except OSError:
+        return None
+    # Add a dark overlay so text remains readable on top of images
+    overlay = Image.new('RGBA', CARD_SIZE, (0, 0, 0, 100)) # 100 = opacity
+    background = Image.alpha_composite(background, overlay)
+    
+    _backgrounds.set(background_key, background)
+    return background
+
+
+def avatar_layer(avatar_key: str, avatar_data: bytes) -> Optional[Image.Image]:
+    """120x120 avatar whose alpha channel is a circular mask; None if it won't decode"""
+    avatar = _avatars.get(avatar_key)
+    if avatar is not None:
+        return avatar
+    
+    try:
+        avatar = Image.open(io.BytesIO(avatar_data)).convert('RGBA').resize((120, 120))
+    except OSError:
+        return None
+    
+    # Create circular mask
+    mask = Image.new('L', (120, 120), 0)
+    mask_draw = ImageDraw.Draw(mask)
+    mask_draw.ellipse((0, 0, 120, 120), fill=255)
+    avatar.putalpha(ImageChops.multiply(avatar.getchannel('A'), mask))
+    
+    _avatars.set(avatar_key, avatar)
+    return avatar
+
+
+def card_template(cls: str, background_key: Optional[str] = None, background_data: Optional[bytes] = None,
+                  with_border: bool = True) -> Optional[Image.Image]:
+    """Base layer for a class: background, accent bars and the avatar ring
+    
+    Renders must ``.copy()`` the result; it is shared by every later render.
+    None when the background for ``background_key`` is not available here.
+    """
+    key = (cls, background_key, with_border)
+    template = _templates.get(key)
+    if template is not None:
+        return template
+    
+    if background_key is None:
+        background = gradient_layer()
+    else:
+        background = background_layer(background_key, background_data)
+        if background is None:
+            return None
+    
+    width, height = CARD_SIZE
+    img = background.copy()
+    draw = ImageDraw.Draw(img)
+    
+    # Get class color
+    class_color = ProfileCardGenerator.CLASS_COLORS.get(cls, (255, 255, 255))
+    
+    # Draw accent lines
+    draw.rectangle([(0, 0), (width, 5)], fill=class_color)
+    draw.rectangle([(0, height-5), (width, height)], fill=class_color)
+    
+    if with_border:
+        border = Image.new('RGBA', (130, 130), class_color)
+        img.paste(border, (30, 50), border_mask())
+    
+    # Bar tracks and stat boxes look the same on every card. Emoji labels are
+    # drawn per render: their source may download, and templates are built in
+    # the worker initializer, which must not touch the network
+    for y_offset in (180, 220):
+        draw.rounded_rectangle([(250, y_offset), (550, y_offset + 25)], radius=5, fill=(60, 60, 70))
+    for i in range(3):
+        x_pos = 180 + (i * 140)
+        draw.rounded_rectangle([(x_pos, 270), (x_pos + 130, 305)], radius=8, fill=(70, 70, 90))
+    
+    _templates.set(key, img)
+    return img
+
+
+def warm_templates():
+    """Build every class's fallback templates and load fonts; RenderPool worker initializer"""
+    card_fonts()
+    for cls in ProfileCardGenerator.CLASS_COLORS:
+        card_template(cls, with_border=True)
+        card_template(cls, with_border=False)
+
 
 class ProfileCardGenerator:
     """Generate custom profile cards with backgrounds and stats"""
@@ -32,189 +207,218 @@ class ProfileCardGenerator:
         'Legendary Hero': 'https://i.imgur.com/8rKBMN2.png'
     }
     
+    # Bump when the card layout changes so cached PNGs on disk are not reused
+    RENDER_VERSION = 1
+    
+    # Rendered PNGs keyed by everything the card shows
+    cache = RenderCache(max_bytes=32 * 1024 * 1024, disk_dir=PROFILE_CARD_CACHE_DIR)
+    
+    # Renders run here so PIL and Pilmoji never block the gateway loop
+    renderer = RenderPool(initializer=warm_templates)
+    
+    # Downloaded image bytes; render workers decode them and keep their own layers
+    backgrounds = TTLCache(maxsize=32, ttl=6 * 3600)
+    avatars = TTLCache(maxsize=1024, ttl=3600)
+    
+    @staticmethod
+    async def _background(url: str) -> Optional[bytes]:
+        """Rank background image bytes"""
+        data = ProfileCardGenerator.backgrounds.get(url)
+        if data is None:
+            data = await HttpClient.fetch_bytes(url)
+            if data is not None:
+                ProfileCardGenerator.backgrounds.set(url, data)
+        return data
+    
+    @staticmethod
+    async def _avatar(discord_user: discord.User) -> Optional[bytes]:
+        """Avatar image bytes at the size the card draws, keyed by avatar hash"""
+        key = discord_user.display_avatar.key
+        data = ProfileCardGenerator.avatars.get(key)
+        if data is None:
+            data = await HttpClient.fetch_bytes(str(discord_user.display_avatar.with_size(128).url))
+            if data is not None:
+                ProfileCardGenerator.avatars.set(key, data)
+        return data
+    
+    @staticmethod
+    def card_key(user_data, discord_user: discord.User) -> str:
+        """Fingerprint of every field drawn on the card"""
+        return RenderCache.fingerprint(
+            ProfileCardGenerator.RENDER_VERSION,
+            user_data.username, user_data.cls, user_data.level, user_data.xp,
+            user_data.hp, user_data.max_hp, user_data.attack, user_data.defense,
+            user_data.balance, user_data.pvp_wins, user_data.pvp_losses,
+            user_data.adventure_count, user_data.boss_kills,
+            discord_user.display_avatar.key
+        )
+    
     @staticmethod
     async def create_profile_card(user_data, discord_user: discord.User) -> discord.File:
-        """Create a custom profile card image"""
+        """Create a custom profile card image, reusing an identical earlier render"""
+        key = ProfileCardGenerator.card_key(user_data, discord_user)
+        png = await ProfileCardGenerator.cache.get(key)
+        if png is not None:
+            return discord.File(io.BytesIO(png), filename='profile.png')
+        
         try:
-            # Create base image
-            width, height = 800, 400
-            img = Image.new('RGBA', (width, height), color=(30, 30, 40)) # Changed to RGBA for better handling
-            
             bg_url = ProfileCardGenerator.RANK_BACKGROUNDS.get(user_data.cls)
-            bg_loaded = False
-            
-            if bg_url:
-                try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(bg_url) as resp:
-                            if resp.status == 200:
-                                bg_data = await resp.read()
-                                bg_img = Image.open(io.BytesIO(bg_data)).convert('RGBA')
-                                # Resize background to fit card exactly
-                                bg_img = bg_img.resize((width, height))
-                                # Paste background
-                                img.paste(bg_img, (0, 0))
-                                
-                                # Add a dark overlay so text remains readable on top of images
-                                overlay = Image.new('RGBA', (width, height), (0, 0, 0, 100)) # 100 = opacity
-                                img = Image.alpha_composite(img, overlay)
-                                bg_loaded = True
-                except Exception as e:
-                    print(f"Failed to load background: {e}")
-
-            # Fallback: If no BG loaded, draw the gradient
-            if not bg_loaded:
-                draw = ImageDraw.Draw(img)
-                for i in range(height):
-                    alpha = i / height
-                    color = tuple(int(30 + (50 - 30) * alpha) for _ in range(3))
-                    draw.rectangle([(0, i), (width, i+1)], fill=color)
-
-            # Re-initialize draw object for shapes (Pilmoji handles text separately)
-            draw = ImageDraw.Draw(img)
-            
-            # Get class color
-            class_color = ProfileCardGenerator.CLASS_COLORS.get(user_data.cls, (255, 255, 255))
-            
-            # Draw accent lines
-            draw.rectangle([(0, 0), (width, 5)], fill=class_color)
-            draw.rectangle([(0, height-5), (width, height)], fill=class_color)
+            renderer = ProfileCardGenerator.renderer
             
             try:
-                avatar_url = discord_user.display_avatar.url
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(str(avatar_url)) as resp:
-                        if resp.status == 200:
-                            avatar_data = await resp.read()
-                            avatar = Image.open(io.BytesIO(avatar_data)).convert('RGBA') # Convert to RGBA
-                            avatar = avatar.resize((120, 120))
-                            
-                            # Create circular mask
-                            mask = Image.new('L', (120, 120), 0)
-                            mask_draw = ImageDraw.Draw(mask)
-                            mask_draw.ellipse((0, 0, 120, 120), fill=255)
-                            
-                            # Create border
-                            border_size = 130
-                            border = Image.new('RGBA', (border_size, border_size), class_color)
-                            border_mask = Image.new('L', (border_size, border_size), 0)
-                            border_draw = ImageDraw.Draw(border_mask)
-                            border_draw.ellipse((0, 0, border_size, border_size), fill=255)
-                            
-                            # Paste avatar
-                            img.paste(border, (30, 50), border_mask)
-                            img.paste(avatar, (35, 55), mask)
-            except:
-                draw.ellipse([(30, 50), (150, 170)], fill=class_color)
-                draw.ellipse([(35, 55), (145, 165)], fill=(50, 50, 60))
+                avatar = await ProfileCardGenerator._avatar(discord_user)
+            except Exception:
+                avatar = None
             
-            try:
-                title_font = ImageFont.truetype("arial.ttf", 36)
-                header_font = ImageFont.truetype("arial.ttf", 24)
-                text_font = ImageFont.truetype("arial.ttf", 18)
-                small_font = ImageFont.truetype("arial.ttf", 14)
-            except:
-                title_font = ImageFont.load_default()
-                header_font = ImageFont.load_default()
-                text_font = ImageFont.load_default()
-                small_font = ImageFont.load_default()
-
-            with Pilmoji(img) as pilmoji:
-                
-                # Username
-                pilmoji.text((180, 60), str(user_data.username), fill=(255, 255, 255), font=title_font)
-                
-                # Class Badge
-                class_text = f"⚔️ {user_data.cls}"
-                # Get text size using standard font method
-                left, _top, right, _bottom = draw.textbbox((0, 0), class_text, font=header_font)
-                class_width = right - left
-                
-                # Draw the background rectangle using standard 'draw' (Pilmoji is only for text)
-                draw.rounded_rectangle(
-                    [(180, 110), (195 + class_width, 145)],
-                    radius=10,
-                    fill=class_color
-                )
-                # Draw text with emoji on top
-                pilmoji.text((188, 115), class_text, fill=(255, 255, 255), font=header_font)
-                
-                # Level Badge
-                level_text = f"Level {user_data.level}"
-                draw.rounded_rectangle(
-                    [(205 + class_width, 110), (325 + class_width, 145)],
-                    radius=10,
-                    fill=(70, 70, 90)
-                )
-                pilmoji.text((215 + class_width, 115), level_text, fill=(255, 215, 0), font=header_font)
-                
-                # Stats section
-                y_offset = 180
-                
-                # HP Bar Text
-                pilmoji.text((180, y_offset), "❤️ HP", fill=(255, 100, 100), font=text_font)
-                
-                # HP Bar Graphics (Standard Draw)
-                hp_percentage = user_data.hp / user_data.max_hp
-                draw.rounded_rectangle([(250, y_offset), (550, y_offset + 25)], radius=5, fill=(60, 60, 70))
-                draw.rounded_rectangle(
-                    [(250, y_offset), (250 + int(300 * hp_percentage), y_offset + 25)],
-                    radius=5,
-                    fill=(220, 20, 60)
-                )
-                pilmoji.text((560, y_offset), f"{user_data.hp}/{user_data.max_hp}", fill=(255, 255, 255), font=text_font)
-                
-                # XP Bar Text
-                y_offset += 40
-                next_xp = GameLogic.calculate_level_xp(user_data.level)
-                pilmoji.text((180, y_offset), "✨ XP", fill=(100, 149, 237), font=text_font)
-                
-                # XP Bar Graphics
-                xp_percentage = user_data.xp / next_xp if next_xp > 0 else 0
-                draw.rounded_rectangle([(250, y_offset), (550, y_offset + 25)], radius=5, fill=(60, 60, 70))
-                draw.rounded_rectangle(
-                    [(250, y_offset), (250 + int(300 * xp_percentage), y_offset + 25)],
-                    radius=5,
-                    fill=(100, 149, 237)
-                )
-                pilmoji.text((560, y_offset), f"{user_data.xp}/{next_xp}", fill=(255, 255, 255), font=text_font)
-                
-                # Combat stats
-                y_offset += 50
-                stats_text = [
-                    f"⚔️ ATK: {user_data.attack}",
-                    f"🛡️ DEF: {user_data.defense}",
-                    f"💰 {user_data.balance:,}"
-                ]
-                
-                for i, stat in enumerate(stats_text):
-                    x_pos = 180 + (i * 140)
-                    draw.rounded_rectangle(
-                        [(x_pos, y_offset), (x_pos + 130, y_offset + 35)],
-                        radius=8,
-                        fill=(70, 70, 90)
-                    )
-                    pilmoji.text((x_pos + 10, y_offset + 8), stat, fill=(255, 255, 255), font=text_font)
-                
-                # PvP Record
-                y_offset += 50
-                win_rate = user_data.win_rate
-                record_text = f"⚔️ PvP: {user_data.pvp_wins}W / {user_data.pvp_losses}L ({win_rate:.1f}%)"
-                pilmoji.text((180, y_offset), record_text, fill=(255, 215, 0), font=text_font)
-                
-                # Achievements
-                y_offset += 30
-                achievements = f"🗺️ {user_data.adventure_count} Adventures   |   🐉 {user_data.boss_kills} Bosses"
-                pilmoji.text((180, y_offset), achievements, fill=(150, 150, 150), font=small_font)
+            # Draw off the event loop from a plain-data snapshot of the user.
+            # Workers keep their own background layers, so the image bytes are
+            # only sent to a worker that reports it has not seen this one yet
+            snapshot = asdict(user_data)
+            avatar_key = discord_user.display_avatar.key
+            png = None
+            if bg_url:
+                png = await renderer.run(render_card, snapshot, bg_url, avatar_key, avatar)
+                if png is None:
+                    try:
+                        background = await ProfileCardGenerator._background(bg_url)
+                    except Exception as e:
+                        print(f"Failed to load background: {e}")
+                        background = None
+                    if background is not None:
+                        png = await renderer.run(render_card, snapshot, bg_url, avatar_key, avatar, background)
             
-            # Save to bytes
-            buffer = io.BytesIO()
-            img.save(buffer, format='PNG')
-            buffer.seek(0)
+            background_loaded = png is not None
+            if png is None:
+                png = await renderer.run(render_card, snapshot, None, avatar_key, avatar)
             
-            return discord.File(buffer, filename='profile.png')
+            # Cards drawn with fallbacks would be cached as if they were complete
+            if background_loaded and avatar is not None:
+                await ProfileCardGenerator.cache.set(key, png)
+            
+            return discord.File(io.BytesIO(png), filename='profile.png')
         except Exception as e:
             print(f"Error creating profile card: {e}")
             import traceback
             traceback.print_exc() # Helps debug errors
-            return None
\ No newline at end of file
+            return None
+
+
+def render_card(snapshot: Dict[str, Any], background_key: Optional[str], avatar_key: str,
+                avatar_data: Optional[bytes], background_data: Optional[bytes] = None) -> Optional[bytes]:
+    """Draw a profile card to PNG bytes
+    
+    Runs in a RenderPool worker, so it only takes picklable plain data: the
+    user as a dict, the background URL and avatar hash as keys, and the raw
+    avatar bytes (None when they failed to load). Decoded layers are kept
+    per worker under those keys; static layers come from card_template.
+    Returns None when this worker has no layer for ``background_key`` and
+    ``background_data`` was not sent; the caller retries with the bytes.
+    """
+    user_data = User(**snapshot)
+    avatar = avatar_layer(avatar_key, avatar_data) if avatar_data is not None else None
+    
+    template = card_template(user_data.cls, background_key, background_data, with_border=avatar is not None)
+    if template is None:
+        return None
+    
+    # The template is shared by later renders, so always draw on a copy
+    img = template.copy()
+    draw = ImageDraw.Draw(img)
+    
+    # Get class color
+    class_color = ProfileCardGenerator.CLASS_COLORS.get(user_data.cls, (255, 255, 255))
+    
+    if avatar is not None:
+        # Paste avatar; its alpha channel is already the circular mask
+        img.paste(avatar, (35, 55), avatar)
+    else:
+        draw.ellipse([(30, 50), (150, 170)], fill=class_color)
+        draw.ellipse([(35, 55), (145, 165)], fill=(50, 50, 60))
+    
+    title_font, header_font, text_font, small_font = card_fonts()
+    
+    with Pilmoji(img, source=EMOJI_SOURCE) as pilmoji:
+    
+        # Username
+        pilmoji.text((180, 60), str(user_data.username), fill=(255, 255, 255), font=title_font)
+        
+        # Class Badge
+        class_text = f"⚔️ {user_data.cls}"
+        # Get text size using standard font method
+        left, _top, right, _bottom = draw.textbbox((0, 0), class_text, font=header_font)
+        class_width = right - left
+        
+        # Draw the background rectangle using standard 'draw' (Pilmoji is only for text)
+        draw.rounded_rectangle(
+            [(180, 110), (195 + class_width, 145)],
+            radius=10,
+            fill=class_color
+        )
+        # Draw text with emoji on top
+        pilmoji.text((188, 115), class_text, fill=(255, 255, 255), font=header_font)
+        
+        # Level Badge
+        level_text = f"Level {user_data.level}"
+        draw.rounded_rectangle(
+            [(205 + class_width, 110), (325 + class_width, 145)],
+            radius=10,
+            fill=(70, 70, 90)
+        )
+        pilmoji.text((215 + class_width, 115), level_text, fill=(255, 215, 0), font=header_font)
+        
+        # Stats section
+        y_offset = 180
+        
+        # HP Bar (Pilmoji for emoji); the track is in the template
+        pilmoji.text((180, y_offset), "❤️ HP", fill=(255, 100, 100), font=text_font)
+        
+        # HP Bar Graphics (Standard Draw)
+        hp_percentage = user_data.hp / user_data.max_hp
+        draw.rounded_rectangle(
+            [(250, y_offset), (250 + int(300 * hp_percentage), y_offset + 25)],
+            radius=5,
+            fill=(220, 20, 60)
+        )
+        pilmoji.text((560, y_offset), f"{user_data.hp}/{user_data.max_hp}", fill=(255, 255, 255), font=text_font)
+        
+        # XP Bar
+        y_offset += 40
+        next_xp = GameLogic.calculate_level_xp(user_data.level)
+        pilmoji.text((180, y_offset), "✨ XP", fill=(100, 149, 237), font=text_font)
+        
+        # XP Bar Graphics
+        xp_percentage = user_data.xp / next_xp if next_xp > 0 else 0
+        draw.rounded_rectangle(
+            [(250, y_offset), (250 + int(300 * xp_percentage), y_offset + 25)],
+            radius=5,
+            fill=(100, 149, 237)
+        )
+        pilmoji.text((560, y_offset), f"{user_data.xp}/{next_xp}", fill=(255, 255, 255), font=text_font)
+        
+        # Combat stats
+        y_offset += 50
+        stats_text = [
+            f"⚔️ ATK: {user_data.attack}",
+            f"🛡️ DEF: {user_data.defense}",
+            f"💰 {user_data.balance:,}"
+        ]
+        
+        for i, stat in enumerate(stats_text):
+            x_pos = 180 + (i * 140)
+            pilmoji.text((x_pos + 10, y_offset + 8), stat, fill=(255, 255, 255), font=text_font)
+        
+        # PvP Record
+        y_offset += 50
+        win_rate = user_data.win_rate
+        record_text = f"⚔️ PvP: {user_data.pvp_wins}W / {user_data.pvp_losses}L ({win_rate:.1f}%)"
+        pilmoji.text((180, y_offset), record_text, fill=(255, 215, 0), font=text_font)
+        
+        # Achievements
+        y_offset += 30
+        achievements = f"🗺️ {user_data.adventure_count} Adventures   |   🐉 {user_data.boss_kills} Bosses"
+        pilmoji.text((180, y_offset), achievements, fill=(150, 150, 150), font=small_font)
+    
+    # Save to bytes
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG', compress_level=PNG_COMPRESS_LEVEL)
+    return buffer.getvalue()
\ No newline at end of file
@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+class RenderCache:
+    """Byte-capped LRU cache of rendered images with an optional on-disk tier
+
+    Keys are content fingerprints, so an entry never goes stale: anything that
+    changes the picture changes the key, and old keys simply age out.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, disk_dir: Optional[str] = None,
+                 disk_max_bytes: int = 256 * 1024 * 1024, suffix: str = ".png"):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.suffix = suffix
+        self._data: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._disk_size: Optional[int] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(*parts: Hashable) -> str:
+        """Stable key for everything that affects a render"""
+        return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return cached bytes from memory, then disk, or None"""
+        data = self._data.get(key)
+        if data is not None:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return data
+
+        if self.disk_dir:
+            data = await asyncio.to_thread(self._read_disk, key)
+            if data is not None:
+                self.disk_hits += 1
+                self._remember(key, data)
+                return data
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, data: bytes):
+        """Store rendered bytes in memory and, if enabled, on disk"""
+        self._remember(key, data)
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, data)
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters"""
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._data),
+            'bytes': self._size
+        }
+
+    def _remember(self, key: str, data: bytes):
+        # Entries larger than the whole budget would only evict everything else
+        if len(data) > self.max_bytes:
+            return
+
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._size -= len(old)
+
+        self._data[key] = data
+        self._size += len(data)
+        while self._size > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self._size -= len(evicted)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key + self.suffix)
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        # Touch the file so disk pruning is least-recently-used too
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return data
+
+    def _write_disk(self, key: str, data: bytes):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return
+
+        if self._disk_size is None:
+            self._disk_size = sum(size for _, size, _ in self._disk_entries())
+        else:
+            self._disk_size += len(data)
+
+        if self._disk_size > self.disk_max_bytes:
+            self._prune_disk()
+
+    def _disk_entries(self):
+        for entry in os.scandir(self.disk_dir):
+            if entry.is_file() and entry.name.endswith(self.suffix):
+                stat = entry.stat()
+                yield entry.path, stat.st_size, stat.st_mtime
+
+    def _prune_disk(self):
+        """Delete the least recently used files until under three quarters of the cap"""
+        entries = sorted(self._disk_entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.disk_max_bytes * 3 // 4
+
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_size = total
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+# Image work is CPU-bound; a couple of processes keep the gateway loop free
+RENDER_WORKERS = 2
+# Renders allowed in flight; further callers wait their turn on the event loop
+MAX_PENDING = 8
+# Process pools that may break in a row before rendering moves to threads
+MAX_BROKEN_POOLS = 3
+
+
+class RenderPool:
+    """Bounded executor for blocking render jobs, process-based with a thread fallback"""
+
+    def __init__(self, workers: int = RENDER_WORKERS, max_pending: int = MAX_PENDING,
+                 initializer: Optional[Callable[[], None]] = None):
+        self.workers = workers
+        self.initializer = initializer
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.uses_processes = False
+        self.completed = 0
+        self.waiting = 0
+        self.broken_pools = 0
+
+    def _ensure_executor(self) -> Executor:
+        if self._executor is None:
+            if self.broken_pools >= MAX_BROKEN_POOLS:
+                log.warning("Render pool broke %d times in a row, rendering in threads", self.broken_pools)
+                self._fallback()
+                return self._executor
+            try:
+                # spawn: forking a process that runs aiosqlite threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self.initializer,
+                )
+                self.uses_processes = True
+            except (OSError, NotImplementedError, ValueError):
+                log.warning("Process pool unavailable, rendering in threads", exc_info=True)
+                self._fallback()
+        return self._executor
+
+    def _fallback(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="render",
+            initializer=self.initializer,
+        )
+        self.uses_processes = False
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` off the event loop, waiting for a free slot first"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        loop = asyncio.get_running_loop()
+        future: Optional[asyncio.Future] = None
+        handed_off = False
+        try:
+            executor = self._ensure_executor()
+            try:
+                future = loop.run_in_executor(executor, fn, *args)
+                result = await asyncio.shield(future)
+            except BrokenExecutor:
+                # Covers both pool kinds: a crashed worker or a failed initializer
+                log.warning("Render pool broke, starting a new one", exc_info=True)
+                self._discard(executor)
+                executor = self._ensure_executor()
+                try:
+                    future = loop.run_in_executor(executor, fn, *args)
+                    result = await asyncio.shield(future)
+                except BrokenExecutor:
+                    # Don't keep a dead pool around; the next render builds a fresh one
+                    self._discard(executor)
+                    raise
+            self.completed += 1
+            self.broken_pools = 0
+            return result
+        except asyncio.CancelledError:
+            if future is not None and not future.done():
+                # The worker still runs the job, so it keeps the slot until it ends
+                future.add_done_callback(self._abandoned_done)
+                handed_off = True
+            raise
+        finally:
+            if not handed_off:
+                self._slots.release()
+
+    def _abandoned_done(self, future: asyncio.Future):
+        """Free the slot of a job whose caller was cancelled"""
+        if not future.cancelled():
+            # Nobody awaits it any more; retrieve the error so it isn't logged as unhandled
+            future.exception()
+        self._slots.release()
+
+    def _discard(self, broken: Executor):
+        """Drop a broken executor so the next job starts a fresh one, unless a concurrent render already did"""
+        if self._executor is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.broken_pools += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool counters"""
+        return {
+            'processes': self.uses_processes,
+            'workers': self.workers,
+            'waiting': self.waiting,
+            'completed': self.completed,
+            'broken_pools': self.broken_pools
+        }
+
+    def shutdown(self):
+        """Stop the workers; queued renders are cancelled"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
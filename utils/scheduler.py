@@ -0,0 +1,102 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+# Re-check the heap at least this often so wall-clock jumps can't strand a job
+MAX_SLEEP = 300
+
+
+class Scheduler:
+    """Min-heap of keys due at wall-clock times, fired by one task that sleeps until the earliest
+
+    ``callback`` receives every key that is due at a wake-up as one batch.
+    Cancelled and rescheduled keys are dropped lazily when they reach the top.
+    """
+
+    def __init__(self, callback: Callable[[List[Hashable]], Awaitable[None]]):
+        self.callback = callback
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._due: Dict[Hashable, float] = {}
+        self._order = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.fired = 0
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._due
+
+    def schedule(self, key: Hashable, when: float):
+        """Fire ``key`` at the epoch time ``when``, replacing any earlier schedule"""
+        head = self.next_due()
+        self._due[key] = when
+        heapq.heappush(self._heap, (when, next(self._order), key))
+        if head is None or when < head:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable):
+        """Forget ``key``; its heap entry is skipped when it comes up"""
+        self._due.pop(key, None)
+
+    def next_due(self) -> Optional[float]:
+        """Epoch time of the earliest live key, or None when idle"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop sleeping, letting a batch that is already running finish first"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    def _drop_stale(self):
+        while self._heap:
+            when, _, key = self._heap[0]
+            if self._due.get(key) == when:
+                return
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now: float) -> List[Hashable]:
+        keys = []
+        while True:
+            when = self.next_due()
+            if when is None or when > now:
+                return keys
+            _, _, key = heapq.heappop(self._heap)
+            del self._due[key]
+            keys.append(key)
+
+    async def _run(self):
+        while not self._stopping:
+            keys = self._pop_due(time.time())
+            if keys:
+                self.fired += len(keys)
+                try:
+                    await self.callback(keys)
+                except Exception:
+                    log.exception("Scheduled callback failed for %d keys", len(keys))
+                continue
+
+            when = self.next_due()
+            timeout = MAX_SLEEP if when is None else min(MAX_SLEEP, max(0.0, when - time.time()))
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
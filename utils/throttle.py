@@ -0,0 +1,66 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+class MessageThrottle:
+    """Per-user reward window kept in memory on the monotonic clock"""
+
+    def __init__(self, window: float = 60, max_entries: int = 50_000):
+        self.window = window
+        self.max_entries = max_entries
+        self._last: "OrderedDict[int, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def try_acquire(
+        self,
+        user_id: int,
+        loader: Callable[[int], Awaitable[Optional[datetime]]]
+    ) -> bool:
+        """Return True and start a new window if the user may be rewarded.
+
+        Unknown users are warmed once through ``loader``, which returns the
+        persisted wall-clock time of their last reward (or None).
+        """
+        last = self._last.get(user_id)
+        if last is None:
+            self.misses += 1
+            loaded = await loader(user_id)
+            # Another message may have warmed the entry while we awaited
+            last = self._last.get(user_id)
+            if last is None:
+                last = self._to_monotonic(loaded)
+        else:
+            self.hits += 1
+
+        now = time.monotonic()
+        if now - last < self.window:
+            self._store(user_id, last)
+            return False
+
+        self._store(user_id, now)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._last)
+        }
+
+    def _to_monotonic(self, last: Optional[datetime]) -> float:
+        if last is None:
+            return float('-inf')
+        elapsed = (datetime.now() - last).total_seconds()
+        return time.monotonic() - elapsed
+
+    def _store(self, user_id: int, stamp: float):
+        self._last[user_id] = stamp
+        self._last.move_to_end(user_id)
+        while len(self._last) > self.max_entries:
+            self._last.popitem(last=False)
+            self.evictions += 1
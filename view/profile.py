@@ -1,42 +1,39 @@
+from typing import Optional, Sequence
+
 import discord
 from discord import Embed, Color
-from discord.ui import View, Button
+from utils.component_router import RoutedView
 from utils.game_logic import GameLogic
 
-class ProfileView(View):
-    """Interactive profile view with navigation buttons"""
+class ProfileView(RoutedView):
+    """Profile page buttons, routed as ``profile:<user id>:<page>``
+    
+    The view itself only renders; clicks go through the "profile" route,
+    which reloads the user and builds a fresh ProfileView for the page.
+    """
     
-    def __init__(self, user_data, discord_user: discord.User, inventory_count: int, equipped: list):
-        super().__init__(timeout=120)
+    def __init__(self, user_data, avatar_url: Optional[str], inventory_count: int = 0, equipped: Sequence[str] = ()):
+        super().__init__()
         self.user_data = user_data
-        self.discord_user = discord_user
+        self.avatar_url = avatar_url
         self.inventory_count = inventory_count
         self.equipped = equipped
-        self.current_page = "stats"
-    
-    @discord.ui.button(label="📊 Stats", style=discord.ButtonStyle.primary, custom_id="stats")
-    async def stats_button(self, interaction: discord.Interaction, button: Button):
-        self.current_page = "stats"
-        embed = self.create_stats_embed()
-        await interaction.response.edit_message(embed=embed, view=self)
-    
-    @discord.ui.button(label="⚔️ Combat", style=discord.ButtonStyle.danger, custom_id="combat")
-    async def combat_button(self, interaction: discord.Interaction, button: Button):
-        self.current_page = "combat"
-        embed = self.create_combat_embed()
-        await interaction.response.edit_message(embed=embed, view=self)
-    
-    @discord.ui.button(label="🎒 Inventory", style=discord.ButtonStyle.success, custom_id="inventory")
-    async def inventory_button(self, interaction: discord.Interaction, button: Button):
-        self.current_page = "inventory"
-        embed = self.create_inventory_embed()
-        await interaction.response.edit_message(embed=embed, view=self)
+        
+        user_id = user_data.user_id
+        self.add_route("profile", user_id, "stats", label="📊 Stats", style=discord.ButtonStyle.primary)
+        self.add_route("profile", user_id, "combat", label="⚔️ Combat", style=discord.ButtonStyle.danger)
+        self.add_route("profile", user_id, "inventory", label="🎒 Inventory", style=discord.ButtonStyle.success)
+        self.add_route("profile", user_id, "achievements", label="🏆 Achievements", style=discord.ButtonStyle.secondary)
     
-    @discord.ui.button(label="🏆 Achievements", style=discord.ButtonStyle.secondary, custom_id="achievements")
-    async def achievements_button(self, interaction: discord.Interaction, button: Button):
-        self.current_page = "achievements"
-        embed = self.create_achievements_embed()
-        await interaction.response.edit_message(embed=embed, view=self)
+    def create_page_embed(self, page: str) -> Embed:
+        """Embed for ``page``, falling back to stats for unknown pages"""
+        if page == "combat":
+            return self.create_combat_embed()
+        if page == "inventory":
+            return self.create_inventory_embed()
+        if page == "achievements":
+            return self.create_achievements_embed()
+        return self.create_stats_embed()
     
     def create_stats_embed(self) -> Embed:
         """Create stats page embed"""
@@ -62,10 +59,10 @@ class ProfileView(View):
         
         embed.add_field(name="📊 Character Stats", value=stats_text, inline=False)
         
-        if self.discord_user.avatar:
-            embed.set_thumbnail(url=self.discord_user.avatar.url)
+        if self.avatar_url:
+            embed.set_thumbnail(url=self.avatar_url)
         
-        embed.set_footer(text="Use the buttons below to navigate • Profile expires in 2 minutes")
+        embed.set_footer(text="Use the buttons below to navigate")
         embed.set_image(url="attachment://profile.png")
         
         return embed
@@ -110,8 +107,8 @@ class ProfileView(View):
         
         embed.add_field(name="🏅 Combat Rank", value=rank, inline=False)
         
-        if self.discord_user.avatar:
-            embed.set_thumbnail(url=self.discord_user.avatar.url)
+        if self.avatar_url:
+            embed.set_thumbnail(url=self.avatar_url)
         
         embed.set_footer(text="Keep battling to improve your stats!")
         
@@ -146,8 +143,8 @@ class ProfileView(View):
             inline=True
         )
         
-        if self.discord_user.avatar:
-            embed.set_thumbnail(url=self.discord_user.avatar.url)
+        if self.avatar_url:
+            embed.set_thumbnail(url=self.avatar_url)
         
         embed.set_footer(text="Visit /shop to get more items!")
         
@@ -224,8 +221,8 @@ class ProfileView(View):
                 inline=False
             )
         
-        if self.discord_user.avatar:
-            embed.set_thumbnail(url=self.discord_user.avatar.url)
+        if self.avatar_url:
+            embed.set_thumbnail(url=self.avatar_url)
         
         embed.set_footer(text="Keep playing to unlock more achievements!")
         